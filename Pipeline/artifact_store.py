@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+
+from step_cache import IGNORED_DIRS, IGNORED_SUFFIXES, hash_file
+
+# Upload layer for the pipeline's inputs. Every object carries the SHA-256 of
+# its content as metadata, so an upload whose content is already at the
+# destination is skipped after a single HEAD request.
+
+HASH_METADATA = 'sha256'
+MULTIPART_THRESHOLD = 64 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+MAX_CONCURRENCY = 10
+
+def deterministic_tarball(src_dir):
+    """gzip'd tar of src_dir with sorted entries and fixed metadata; equal code gives equal bytes"""
+    buffer = io.BytesIO()
+    # mtime=0 keeps the gzip header free of the build time
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gz:
+        with tarfile.open(fileobj=gz, mode='w', format=tarfile.PAX_FORMAT) as tar:
+            for dirpath, dirnames, filenames in os.walk(src_dir):
+                dirnames[:] = sorted(d for d in dirnames if d not in IGNORED_DIRS)
+                for name in sorted(filenames):
+                    if name.endswith(IGNORED_SUFFIXES):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    info = tarfile.TarInfo(os.path.relpath(path, src_dir).replace(os.sep, '/'))
+                    info.size = os.path.getsize(path)
+                    info.mode = 0o755 if os.access(path, os.X_OK) else 0o644
+                    info.mtime = 0
+                    with open(path, 'rb') as f:
+                        tar.addfile(info, f)
+    return buffer.getvalue()
+
+class S3ObjectStore:
+    """S3 bucket; large files go up as parallel multipart uploads"""
+
+    def __init__(self, bucket, s3=None):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        self.bucket = bucket
+        self.s3 = s3 or boto3.client('s3')
+        self.transfer_config = TransferConfig(multipart_threshold=MULTIPART_THRESHOLD,
+                                              multipart_chunksize=MULTIPART_CHUNKSIZE,
+                                              max_concurrency=MAX_CONCURRENCY, use_threads=True)
+
+    def content_hash(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            head = self.s3.head_object(Bucket=self.bucket, Key=key)
+        except ClientError:
+            return None
+        return head.get('Metadata', {}).get(HASH_METADATA)
+
+    def put_bytes(self, key, data, sha256):
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=data, Metadata={HASH_METADATA: sha256})
+
+    def put_file(self, key, path, sha256):
+        self.s3.upload_file(path, self.bucket, key, ExtraArgs={'Metadata': {HASH_METADATA: sha256}},
+                            Config=self.transfer_config)
+
+class LocalObjectStore:
+    """Filesystem stand-in for S3ObjectStore: objects under root, metadata in <key>.meta.json"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def content_hash(self, key):
+        try:
+            with open(self._path(key) + '.meta.json') as f:
+                return json.load(f).get(HASH_METADATA)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key, write, sha256):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            write(f)
+        os.replace(path + '.tmp', path)
+        with open(path + '.meta.json', 'w') as f:
+            json.dump({HASH_METADATA: sha256}, f)
+
+    def put_bytes(self, key, data, sha256):
+        self._write(key, lambda f: f.write(data), sha256)
+
+    def put_file(self, key, path, sha256):
+        def copy(f):
+            with open(path, 'rb') as src:
+                while block := src.read(MULTIPART_CHUNKSIZE):
+                    f.write(block)
+        self._write(key, copy, sha256)
+
+def open_store(uri):
+    """Object store for s3://bucket or a local directory path"""
+    if uri.startswith('s3://'):
+        return S3ObjectStore(uri[len('s3://'):].strip('/'))
+    return LocalObjectStore(uri)
+
+def upload_bytes(store, key, data):
+    """Upload data unless the destination already holds the same content; True if uploaded"""
+    sha256 = hashlib.sha256(data).hexdigest()
+    if store.content_hash(key) == sha256:
+        return False
+    store.put_bytes(key, data, sha256)
+    return True
+
+def upload_file(store, key, path):
+    """Upload a file unless the destination already holds the same content; True if uploaded"""
+    sha256 = hash_file(path).hexdigest()
+    if store.content_hash(key) == sha256:
+        return False
+    store.put_file(key, path, sha256)
+    return True
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import time
+
+# Index of trained models: one JSON manifest mapping each model version (the
+# training job name) to its artifact, evaluation metrics and approval state,
+# plus a pointer to the latest approved version, so deploy resolves the
+# model to serve with a single read instead of listing model-output/.
+
+REGISTRY_FORMAT = 'loan-model-registry'
+REGISTRY_FORMAT_VERSION = 1
+MAX_WRITE_ATTEMPTS = 5
+
+def empty_manifest():
+    return {'format': REGISTRY_FORMAT, 'format_version': REGISTRY_FORMAT_VERSION,
+            'latest_approved': None, 'models': {}}
+
+class S3ManifestStore:
+    """Manifest as one S3 object, updated with conditional writes on its ETag"""
+
+    def __init__(self, bucket, key, s3=None):
+        import boto3
+        self.bucket = bucket
+        self.key = key
+        self.s3 = s3 or boto3.client('s3')
+
+    def read(self):
+        """Return (manifest, etag); etag is None when there is no manifest yet"""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self.key)
+        except self.s3.exceptions.NoSuchKey:
+            return empty_manifest(), None
+        return json.loads(response['Body'].read()), response['ETag']
+
+    def write(self, manifest, etag):
+        """Write unless someone else wrote since etag was read; True on success"""
+        from botocore.exceptions import ClientError
+        condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+        try:
+            self.s3.put_object(Bucket=self.bucket, Key=self.key, ContentType='application/json',
+                               Body=json.dumps(manifest, indent=2).encode('utf-8'), **condition)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                return False
+            raise
+        return True
+
+class LocalManifestStore:
+    """Manifest as a local JSON file; the content hash stands in for the ETag"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        try:
+            with open(self.path, 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return empty_manifest(), None
+        return json.loads(body), hashlib.sha256(body).hexdigest()
+
+    def write(self, manifest, etag):
+        if self.read()[1] != etag:
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(self.path + '.tmp', self.path)
+        return True
+
+def open_registry(uri):
+    """ModelRegistry for an s3://bucket/key.json URI or a local file path"""
+    if uri.startswith('s3://'):
+        bucket, _, key = uri[len('s3://'):].partition('/')
+        return ModelRegistry(S3ManifestStore(bucket, key))
+    return ModelRegistry(LocalManifestStore(uri))
+
+def _latest_approved_version(manifest):
+    """Most recently registered approved version, or None"""
+    candidates = [e for e in manifest['models'].values() if e['approved']]
+    latest = max(candidates, key=lambda e: e['registered'], default=None)
+    return latest['version'] if latest else None
+
+class ModelRegistry:
+    """Register, approve and resolve model versions in the manifest"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def _update(self, change):
+        """Apply change(manifest) and write it back, retrying if another writer got there first"""
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            manifest, etag = self.store.read()
+            result = change(manifest)
+            if self.store.write(manifest, etag):
+                return result
+            time.sleep(0.2)
+        raise RuntimeError("Model registry is being updated concurrently, giving up")
+
+    def register(self, version, model_data_url, metrics=None, approved=False, **details):
+        """Add or refresh a version; an approved version becomes the latest approved.
+
+        A version rejected with set_approval stays rejected when it is
+        registered again; only set_approval can approve it.
+        """
+        def change(manifest):
+            now = time.time()
+            entry = manifest['models'].get(version, {'created': now})
+            approve = approved and not entry.get('rejected', False)
+            entry.update(details, version=version, model_data_url=model_data_url,
+                         metrics=metrics or {}, approved=approve, registered=now)
+            manifest['models'][version] = entry
+            if approve:
+                manifest['latest_approved'] = version
+            elif manifest['latest_approved'] == version:
+                manifest['latest_approved'] = _latest_approved_version(manifest)
+            return entry
+        return self._update(change)
+
+    def set_approval(self, version, approved):
+        """Approve or reject a version; rejecting the latest falls back to the previous approved one"""
+        def change(manifest):
+            entry = manifest['models'][version]
+            entry['approved'] = approved
+            entry['rejected'] = not approved
+            if approved:
+                manifest['latest_approved'] = version
+            elif manifest['latest_approved'] == version:
+                manifest['latest_approved'] = _latest_approved_version(manifest)
+            return entry
+        return self._update(change)
+
+    def versions(self):
+        """All registered versions, approved or not"""
+        return list(self.store.read()[0]['models'])
+
+    def get(self, version):
+        return self.store.read()[0]['models'].get(version)
+
+    def latest_approved(self):
+        """Entry of the latest approved model, or None"""
+        manifest, _ = self.store.read()
+        version = manifest['latest_approved']
+        return manifest['models'][version] if version else None
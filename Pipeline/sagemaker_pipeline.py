@@ -3,39 +3,67 @@ import json
 import time
 import os
 
+from artifact_store import deterministic_tarball, open_store, upload_bytes, upload_file
+from model_registry import open_registry
+from step_cache import StepCache, open_cache, step_key
+from training_waiter import METRIC_DEFINITIONS, StatusEventQueue, TrainingWaiter
+
 # Configuration from environment variables
 REGION = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
 ROLE_ARN = os.environ.get('SAGEMAKER_ROLE_ARN')
 BUCKET = os.environ.get('S3_BUCKET')
+# Model search in train.py: none (single LogisticRegression), grid or random
+TRAINING_SEARCH = os.environ.get('TRAINING_SEARCH', 'none')
+# Step cache location (s3://bucket/prefix or a local directory); STEP_CACHE=off always retrains
+STEP_CACHE_URI = os.environ.get('STEP_CACHE_URI') or (f's3://{BUCKET}/step-cache' if BUCKET else '.step-cache')
+STEP_CACHE_ENABLED = os.environ.get('STEP_CACHE', 'on') != 'off'
+TRAINING_IMAGE = f'492215442770.dkr.ecr.{REGION}.amazonaws.com/sagemaker-scikit-learn:1.0-1-cpu-py3'
+TRAINING_INSTANCE_TYPE = 'ml.m5.large'
+# Manifest of trained models that deploy resolves the latest approved model from
+MODEL_REGISTRY_URI = os.environ.get('MODEL_REGISTRY_URI') or f's3://{BUCKET}/registry/models.json'
+# Where code and data are uploaded; a local directory stands in for S3 in tests
+ARTIFACT_STORE_URI = os.environ.get('ARTIFACT_STORE_URI') or f's3://{BUCKET}'
+# SQS queue fed with training job state change events; empty means polling only
+TRAINING_EVENTS_QUEUE_URL = os.environ.get('TRAINING_EVENTS_QUEUE_URL', '')
+
+def training_hyperparameters():
+    hyperparameters = {
+        'sagemaker_program': 'train.py',
+        'sagemaker_submit_directory': f's3://{BUCKET}/code/source.tar.gz'
+    }
+    if TRAINING_SEARCH != 'none':
+        hyperparameters['search'] = TRAINING_SEARCH
+    return hyperparameters
+
+def training_cache_key():
+    """Hash of everything the trained model depends on"""
+    return step_key('training', files=['data.csv'], dirs=['code'], params={
+        'hyperparameters': training_hyperparameters(),
+        'image': TRAINING_IMAGE,
+        'instance_type': TRAINING_INSTANCE_TYPE
+    })
 
 def upload_code_to_s3():
-    """Upload training code to S3"""
-    import tarfile
-    import tempfile
-    
-    s3 = boto3.client('s3')
+    """Upload training code and data to S3, skipping objects whose content is already there"""
+    store = open_store(ARTIFACT_STORE_URI)
     
-    # Create tar.gz of code directory
-    with tempfile.NamedTemporaryFile(suffix='.tar.gz', delete=False) as tmp:
-        with tarfile.open(tmp.name, 'w:gz') as tar:
-            tar.add('code/', arcname='.')
-        
-        # Upload to S3
-        s3.upload_file(tmp.name, BUCKET, 'code/source.tar.gz')
+    # Deterministic in-memory tar.gz of the code directory
+    if upload_bytes(store, 'code/source.tar.gz', deterministic_tarball('code')):
         print("✅ Code uploaded to S3")
+    else:
+        print("♻️ Code unchanged, skipped upload")
     
-    # Upload data
-    s3.upload_file('data.csv', BUCKET, 'data/data.csv')
-    print("✅ Data uploaded to S3")
+    # Upload data (multipart and parallel when large)
+    if upload_file(store, 'data/data.csv', 'data.csv'):
+        print("✅ Data uploaded to S3")
+    else:
+        print("♻️ Data unchanged, skipped upload")
 
 def create_training_job():
     """Create SageMaker Training Job with CodeBuild integration"""
     if not all([REGION, ROLE_ARN, BUCKET]):
         print("❌ Missing required environment variables")
         return None
-        
-    # Upload code and data first
-    upload_code_to_s3()
     
     sagemaker = boto3.client('sagemaker', region_name=REGION)
     training_job_name = f"loan-model-{int(time.time())}"
@@ -45,13 +73,11 @@ def create_training_job():
             TrainingJobName=training_job_name,
             RoleArn=ROLE_ARN,
             AlgorithmSpecification={
-                'TrainingImage': f'492215442770.dkr.ecr.{REGION}.amazonaws.com/sagemaker-scikit-learn:1.0-1-cpu-py3',
-                'TrainingInputMode': 'File'
-            },
-            HyperParameters={
-                'sagemaker_program': 'train.py',
-                'sagemaker_submit_directory': f's3://{BUCKET}/code/source.tar.gz'
+                'TrainingImage': TRAINING_IMAGE,
+                'TrainingInputMode': 'File',
+                'MetricDefinitions': METRIC_DEFINITIONS
             },
+            HyperParameters=training_hyperparameters(),
             InputDataConfig=[
                 {
                     'ChannelName': 'training',
@@ -69,7 +95,7 @@ def create_training_job():
                 'S3OutputPath': f's3://{BUCKET}/model-output/'
             },
             ResourceConfig={
-                'InstanceType': 'ml.m5.large',
+                'InstanceType': TRAINING_INSTANCE_TYPE,
                 'InstanceCount': 1,
                 'VolumeSizeInGB': 10
             },
@@ -89,49 +115,80 @@ def create_training_job():
 def wait_for_training_completion(job_name):
     """Wait for training job to complete"""
     sagemaker = boto3.client('sagemaker', region_name=REGION)
+    logs = boto3.client('logs', region_name=REGION)
+    events = None
+    if TRAINING_EVENTS_QUEUE_URL:
+        events = StatusEventQueue(boto3.client('sqs', region_name=REGION), TRAINING_EVENTS_QUEUE_URL)
     
-    while True:
-        response = sagemaker.describe_training_job(TrainingJobName=job_name)
-        status = response['TrainingJobStatus']
-        
-        print(f"Training status: {status}")
-        
-        if status in ['Completed', 'Failed', 'Stopped']:
-            return status == 'Completed'
-            
-        time.sleep(30)
+    waiter = TrainingWaiter(sagemaker, job_name, logs=logs, events=events)
+    return waiter.wait()
 
-if __name__ == "__main__":
-    print("🚀 Starting MLOps pipeline with CodeBuild...")
-    job_name = create_training_job()
-    
-    if job_name:
+def run_training():
+    """Train, or reuse the model of an earlier run with the same data, code and hyperparameters"""
+    def train():
+        job_name = create_training_job()
+        if not job_name:
+            print("❌ Failed to start training")
+            exit(1)
         print("✅ Training job started, waiting for completion...")
-        success = wait_for_training_completion(job_name)
-        
-        if success:
-            print("🎉 Training completed successfully!")
-            
-            # Download model for deployment
-            s3 = boto3.client('s3')
-            try:
-                # Create artifacts directory
-                os.makedirs('artifacts', exist_ok=True)
-                
-                # Download model from S3
-                s3.download_file(BUCKET, f'model-output/{job_name}/output/model.tar.gz', 'artifacts/model.tar.gz')
-                
-                # Extract model.pkl
-                import tarfile
-                with tarfile.open('artifacts/model.tar.gz', 'r:gz') as tar:
-                    tar.extractall('artifacts/')
-                
-                print("✅ Model downloaded for deployment")
-            except Exception as e:
-                print(f"⚠️ Could not download model: {e}")
-        else:
+        if not wait_for_training_completion(job_name):
             print("❌ Training failed")
             exit(1)
+        print("🎉 Training completed successfully!")
+        model_data_url = f's3://{BUCKET}/model-output/{job_name}/output/model.tar.gz'
+        return {'model': model_data_url}, {'job_name': job_name}
+
+    # Uploaded on every run, cache hit or not: the endpoint serves code/source.tar.gz,
+    # and on a hit the current code is the code the reused model was trained with
+    upload_code_to_s3()
+    cache = StepCache(open_cache(STEP_CACHE_URI), enabled=STEP_CACHE_ENABLED)
+    return cache.run('training', training_cache_key(), train)
+
+def register_model(entry):
+    """Record the trained (or reused) model and its hold-out evaluation in the model registry"""
+    registry = open_registry(MODEL_REGISTRY_URI)
+    if entry.get('cached') and registry.get(entry['job_name']) is not None:
+        print(f"📒 {entry['job_name']} is already registered, keeping its registry entry")
+        return
+    
+    evaluation = {}
+    if os.path.exists('artifacts/evaluation.json'):
+        with open('artifacts/evaluation.json') as f:
+            evaluation = json.load(f)
     else:
-        print("❌ Failed to start training")
-        exit(1)
\ No newline at end of file
+        print("⚠️ Model has no evaluation.json, registering it unapproved")
+    
+    registry.register(entry['job_name'], entry['artifacts']['model'],
+                      metrics=evaluation.get('metrics'), approved=evaluation.get('approved', False),
+                      cache_key=entry['key'])
+    status = "approved" if evaluation.get('approved') else "not approved"
+    print(f"📒 Registered {entry['job_name']} ({status}) in {MODEL_REGISTRY_URI}")
+
+if __name__ == "__main__":
+    print("🚀 Starting MLOps pipeline with CodeBuild...")
+    if not all([REGION, ROLE_ARN, BUCKET]):
+        print("❌ Missing required environment variables")
+        exit(1)
+    
+    entry = run_training()
+    
+    # Download model for deployment
+    s3 = boto3.client('s3')
+    try:
+        # Create artifacts directory
+        os.makedirs('artifacts', exist_ok=True)
+        
+        # Download model from S3
+        bucket, _, key = entry['artifacts']['model'].replace('s3://', '', 1).partition('/')
+        s3.download_file(bucket, key, 'artifacts/model.tar.gz')
+        
+        # Extract model.pkl
+        import tarfile
+        with tarfile.open('artifacts/model.tar.gz', 'r:gz') as tar:
+            tar.extractall('artifacts/')
+        
+        print("✅ Model downloaded for deployment")
+    except Exception as e:
+        print(f"⚠️ Could not download model: {e}")
+    
+    register_model(entry)
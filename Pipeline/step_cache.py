@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import time
+
+# Content-addressed cache of pipeline step results. A step's key is the hash
+# of everything it depends on (input files, code, hyperparameters); its entry
+# records where the outputs of the run with that key were stored, so an
+# identical later run reuses them instead of recomputing.
+
+IGNORED_DIRS = {'__pycache__', '.ipynb_checkpoints'}
+IGNORED_SUFFIXES = ('.pyc', '.pyo')
+HASH_BLOCK_BYTES = 1 << 20
+
+def hash_file(path, digest=None):
+    """SHA-256 of a file's content, streamed in blocks"""
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest
+
+def hash_tree(root):
+    """SHA-256 over the relative paths and contents of a directory, in sorted order"""
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in IGNORED_DIRS)
+        for name in sorted(filenames):
+            if name.endswith(IGNORED_SUFFIXES):
+                continue
+            path = os.path.join(dirpath, name)
+            digest.update(os.path.relpath(path, root).replace(os.sep, '/').encode('utf-8') + b'\0')
+            hash_file(path, digest)
+            digest.update(b'\0')
+    return digest
+
+def step_key(step, files=(), dirs=(), params=None):
+    """Cache key for a step from its input files, code directories and parameters"""
+    inputs = {
+        'step': step,
+        'files': {path: hash_file(path).hexdigest() for path in files},
+        'dirs': {path: hash_tree(path).hexdigest() for path in dirs},
+        'params': params or {},
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+class LocalCacheStore:
+    """Cache entries as JSON files under a local directory"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, step, key):
+        return os.path.join(self.root, step, f'{key}.json')
+
+    def get(self, step, key):
+        try:
+            with open(self._path(step, key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, step, key, entry):
+        path = self._path(step, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def exists(self, uri):
+        return os.path.exists(uri)
+
+class S3CacheStore:
+    """Cache entries as JSON objects under an S3 prefix"""
+
+    def __init__(self, bucket, prefix='step-cache', s3=None):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.s3 = s3 or boto3.client('s3')
+
+    def _key(self, step, key):
+        return f'{self.prefix}/{step}/{key}.json'
+
+    def get(self, step, key):
+        try:
+            body = self.s3.get_object(Bucket=self.bucket, Key=self._key(step, key))['Body'].read()
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(body)
+
+    def put(self, step, key, entry):
+        self.s3.put_object(Bucket=self.bucket, Key=self._key(step, key),
+                           Body=json.dumps(entry, indent=2).encode('utf-8'),
+                           ContentType='application/json')
+
+    def exists(self, uri):
+        if not uri.startswith('s3://'):
+            return os.path.exists(uri)
+        bucket, _, key = uri[len('s3://'):].partition('/')
+        try:
+            self.s3.head_object(Bucket=bucket, Key=key)
+            return True
+        except Exception:
+            return False
+
+def open_cache(uri):
+    """Cache store for an s3://bucket/prefix URI or a local directory path"""
+    if uri.startswith('s3://'):
+        bucket, _, prefix = uri[len('s3://'):].partition('/')
+        return S3CacheStore(bucket, prefix or 'step-cache')
+    return LocalCacheStore(uri)
+
+class StepCache:
+    """Looks up and records step results; entries whose artifacts are gone are ignored"""
+
+    def __init__(self, store, enabled=True):
+        self.store = store
+        self.enabled = enabled
+
+    def lookup(self, step, key):
+        if not self.enabled:
+            return None
+        entry = self.store.get(step, key)
+        if entry is None:
+            return None
+        missing = [uri for uri in entry['artifacts'].values() if not self.store.exists(uri)]
+        if missing:
+            print(f"⚠️ Cached {step} outputs are gone ({', '.join(missing)}), rerunning")
+            return None
+        return entry
+
+    def record(self, step, key, artifacts, **details):
+        entry = dict(details, step=step, key=key, artifacts=artifacts, created=time.time())
+        if self.enabled:
+            self.store.put(step, key, entry)
+        return entry
+
+    def run(self, step, key, fn):
+        """Return the cached entry for key (marked cached=True), or call fn() -> (artifacts, details) and record it"""
+        entry = self.lookup(step, key)
+        if entry is not None:
+            print(f"♻️ {step}: inputs unchanged (key {key[:12]}), reusing {entry['artifacts']}")
+            return dict(entry, cached=True)
+        result = fn()
+        if result is None:
+            return None
+        artifacts, details = result
+        return self.record(step, key, artifacts, **details)
@@ -0,0 +1,189 @@
+import json
+import re
+import time
+
+# Waits for a SageMaker training job while reporting its progress. Status is
+# polled with adaptive backoff; when a queue receiving the EventBridge
+# "SageMaker Training Job State Change" events is configured, the wait
+# between polls is a long poll on that queue, so a state change is seen
+# within a second of being published.
+
+TERMINAL_STATUSES = ('Completed', 'Failed', 'Stopped')
+LOG_GROUP = '/aws/sagemaker/TrainingJobs'
+# Events for other jobs older than this have nobody left waiting on them
+STALE_EVENT_SECONDS = 600
+# Other jobs' events are hidden from this waiter for this long, so it does
+# not receive them again on every long poll
+FOREIGN_EVENT_VISIBILITY_SECONDS = 30
+
+# Lines train.py prints; also given to SageMaker as MetricDefinitions
+METRIC_DEFINITIONS = [
+    {'Name': 'accuracy', 'Regex': r'Accuracy: ([0-9.]+)'},
+    {'Name': 'f1_score', 'Regex': r'F1 Score: ([0-9.]+)'},
+    {'Name': 'epoch', 'Regex': r'Epoch ([0-9]+)/[0-9]+ done'},
+]
+_METRIC_PATTERNS = [(m['Name'], re.compile(m['Regex'])) for m in METRIC_DEFINITIONS]
+
+def parse_metrics(message):
+    """Metric values found in one log line"""
+    metrics = {}
+    for name, pattern in _METRIC_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            metrics[name] = float(match.group(1))
+    return metrics
+
+def print_event(event):
+    kind = event['type']
+    if kind == 'status':
+        print(f"Training status: {event['status']} ({event['secondary_status']}) after {event['elapsed']:.0f}s")
+    elif kind == 'metrics':
+        print(f"📈 Training metrics: {event['metrics']}")
+    elif kind == 'done':
+        print(f"Training {event['status']} after {event['elapsed']:.0f}s; final metrics: {event['metrics']}")
+
+class TrainingLogTail:
+    """Reads new CloudWatch log lines of a training job and extracts metrics"""
+
+    def __init__(self, logs, job_name):
+        self.logs = logs
+        self.job_name = job_name
+        self.start_time = 0
+        self.seen = set()
+
+    def read_metrics(self):
+        metrics = {}
+        kwargs = {'logGroupName': LOG_GROUP, 'logStreamNamePrefix': f'{self.job_name}/',
+                  'startTime': self.start_time}
+        try:
+            while True:
+                response = self.logs.filter_log_events(**kwargs)
+                for event in response.get('events', []):
+                    if event['eventId'] in self.seen:
+                        continue
+                    self.seen.add(event['eventId'])
+                    self.start_time = max(self.start_time, event['timestamp'])
+                    metrics.update(parse_metrics(event['message']))
+                if 'nextToken' not in response:
+                    break
+                kwargs['nextToken'] = response['nextToken']
+        except self.logs.exceptions.ResourceNotFoundException:
+            pass  # No logs until the instance has started
+        return metrics
+
+class StatusEventQueue:
+    """SQS queue fed by an EventBridge rule on training job state changes"""
+
+    def __init__(self, sqs, queue_url):
+        self.sqs = sqs
+        self.queue_url = queue_url
+
+    def wait(self, job_name, timeout):
+        """Long-poll for up to timeout seconds; return the job's new status if an event arrived.
+
+        Events for this job are consumed. Events for another job are left
+        for the run waiting on it, hidden from this one for
+        FOREIGN_EVENT_VISIBILITY_SECONDS, or deleted once older than
+        STALE_EVENT_SECONDS so they cannot pile up.
+        """
+        response = self.sqs.receive_message(QueueUrl=self.queue_url, MaxNumberOfMessages=10,
+                                            WaitTimeSeconds=max(1, min(20, int(timeout))),
+                                            AttributeNames=['SentTimestamp'])
+        status = None
+        now_ms = time.time() * 1000
+        for message in response.get('Messages', []):
+            try:
+                detail = json.loads(message['Body']).get('detail', {})
+            except ValueError:
+                detail = {}
+            sent_ms = int(message.get('Attributes', {}).get('SentTimestamp', now_ms))
+            if detail.get('TrainingJobName') == job_name:
+                status = detail.get('TrainingJobStatus')
+            elif now_ms - sent_ms < STALE_EVENT_SECONDS * 1000:
+                self.sqs.change_message_visibility(QueueUrl=self.queue_url, ReceiptHandle=message['ReceiptHandle'],
+                                                   VisibilityTimeout=FOREIGN_EVENT_VISIBILITY_SECONDS)
+                continue
+            self.sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=message['ReceiptHandle'])
+        return status
+
+class TrainingWaiter:
+    """Waits for a training job to finish, emitting status and metric events on the way.
+
+    Polling starts at min_interval and backs off by factor up to
+    max_interval while nothing changes; any status change resets it.
+    With an event queue, the pause between polls is spent long-polling
+    the queue instead of sleeping.
+    """
+
+    def __init__(self, sagemaker, job_name, logs=None, events=None, on_event=print_event,
+                 min_interval=5.0, max_interval=30.0, factor=1.5, timeout=None):
+        self.sagemaker = sagemaker
+        self.job_name = job_name
+        self.log_tail = TrainingLogTail(logs, job_name) if logs is not None else None
+        self.events = events
+        self.on_event = on_event
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.timeout = timeout
+        self.polls = 0
+
+    def describe(self):
+        self.polls += 1
+        return self.sagemaker.describe_training_job(TrainingJobName=self.job_name)
+
+    def pause(self, interval):
+        """Sleep, or wait on the event queue; True if an event reported a status change"""
+        if self.events is None:
+            time.sleep(interval)
+            return False
+        start = time.monotonic()
+        try:
+            if self.events.wait(self.job_name, interval) is not None:
+                return True
+        except Exception as e:
+            print(f"⚠️ Event queue unavailable ({e}), falling back to polling")
+            self.events = None
+        # Nothing for this job (or only other jobs' events): sleep out the interval
+        remaining = interval - (time.monotonic() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        return False
+
+    def wait(self):
+        """Block until the job is terminal; True if it completed"""
+        start = time.monotonic()
+        interval = self.min_interval
+        last = None
+        metrics = {}
+        while True:
+            response = self.describe()
+            status = response['TrainingJobStatus']
+            state = (status, response.get('SecondaryStatus'))
+            elapsed = time.monotonic() - start
+            if state != last:
+                self.on_event({'type': 'status', 'status': status, 'secondary_status': state[1],
+                               'elapsed': elapsed})
+                interval = self.min_interval
+                last = state
+
+            if self.log_tail is not None:
+                new_metrics = self.log_tail.read_metrics()
+                if new_metrics:
+                    metrics.update(new_metrics)
+                    self.on_event({'type': 'metrics', 'metrics': new_metrics, 'elapsed': elapsed})
+
+            if status in TERMINAL_STATUSES:
+                for metric in response.get('FinalMetricDataList', []):
+                    metrics[metric['MetricName']] = metric['Value']
+                self.on_event({'type': 'done', 'status': status, 'metrics': metrics, 'elapsed': elapsed,
+                               'polls': self.polls, 'failure_reason': response.get('FailureReason')})
+                return status == 'Completed'
+
+            if self.timeout is not None and elapsed > self.timeout:
+                raise TimeoutError(f"{self.job_name} still {status} after {self.timeout}s")
+
+            if self.pause(interval):
+                interval = self.min_interval
+            else:
+                interval = min(interval * self.factor, self.max_interval)
@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+# Self-hosted counterpart of simple_proxy.lambda_handler: same CORS preflight,
+# same POST JSON in / JSON out contract, served by one asyncio event loop.
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST',
+    'Access-Control-Allow-Headers': 'Content-Type'
+}
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error',
+           502: 'Bad Gateway', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+class BackendError(Exception):
+    def __init__(self, message, status=502, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+async def read_http_message(reader):
+    """Read one HTTP/1.1 message; return (start line, headers, body) or None at EOF"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise ValueError('Chunked bodies are not supported')
+    length = int(headers.get('content-length', '0'))
+    if length > MAX_BODY_BYTES:
+        raise OverflowError(f'Body of {length} bytes exceeds {MAX_BODY_BYTES}')
+    body = await reader.readexactly(length) if length else b''
+    return lines[0], headers, body
+
+class HttpBackend:
+    """Keep-alive connection pool to an HTTP scoring backend (e.g. serve.py /invocations)"""
+
+    def __init__(self, url, pool_size=32):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or '/invocations'
+        self.pool_size = pool_size
+        self._idle = []
+        self._slots = None
+
+    async def _exchange(self, reader, writer, body):
+        writer.write((f'POST {self.path} HTTP/1.1\r\nHost: {self.host}\r\n'
+                      f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+        message = await read_http_message(reader)
+        if message is None:
+            raise ConnectionResetError('Backend closed the connection')
+        return message
+
+    async def invoke(self, body):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            for attempt in range(2):
+                reused = bool(self._idle)
+                reader, writer = self._idle.pop() if reused else await asyncio.open_connection(self.host, self.port)
+                try:
+                    status_line, headers, response = await self._exchange(reader, writer, body)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # An idle keep-alive connection may have been closed by the backend
+                    if not reused or attempt:
+                        raise BackendError('Backend connection failed')
+                except BaseException:
+                    writer.close()
+                    raise
+
+            if headers.get('connection', '').lower() == 'close':
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+            status = int(status_line.split()[1])
+            if status != 200:
+                raise BackendError(f'Backend returned {status}', status, response)
+            return response
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+class LocalBackend:
+    """In-process scorer built on code/inference.py, with requests micro-batched across connections"""
+
+    def __init__(self, model_dir, max_batch_rows=64, max_wait_ms=2.0):
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'code'))
+        import inference
+        from batching import MicroBatcher
+
+        self.inference = inference
+        self.engine = inference.model_fn(model_dir)
+        self.batcher = self.engine.batcher or MicroBatcher(self.engine.predict_proba, max_batch_rows, max_wait_ms)
+
+    async def invoke(self, body):
+        parsed = self.inference.input_fn(body, 'application/json')
+        timer = parsed['timer']
+        timer.mark()
+        prediction, probability = await asyncio.wrap_future(self.batcher.submit(parsed['raw']))
+        timer.lap('predict')
+        result = {'prediction': prediction, 'probability': probability, 'batch': parsed['batch'], 'timer': timer}
+        return self.inference.output_fn(result, 'application/json').encode('utf-8')
+
+    async def close(self):
+        pass
+
+class AsyncProxy:
+    """asyncio HTTP front end with bounded in-flight work, a bounded wait queue and per-request deadlines"""
+
+    def __init__(self, backend, max_in_flight=256, max_queue=1024, timeout=5.0):
+        self.backend = backend
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.waiting = 0
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0, 'rejected': 0, 'timeouts': 0}
+        self._slots = None
+
+    async def handle(self, method, body):
+        """Return (status, headers, body bytes) for one request"""
+        if method == 'OPTIONS':
+            return 200, dict(CORS_HEADERS), b''
+        if method != 'POST':
+            return self.error(405, 'Method not allowed')
+
+        self.stats['requests'] += 1
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        # Shed load instead of queueing without bound
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.stats['rejected'] += 1
+            status, headers, payload = self.error(503, 'Server overloaded, retry later')
+            headers['Retry-After'] = '1'
+            return status, headers, payload
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            finally:
+                self.waiting -= 1
+            try:
+                json.loads(body)
+                result = await asyncio.wait_for(self.backend.invoke(body), max(deadline - time.monotonic(), 0.001))
+            finally:
+                self._slots.release()
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            return self.error(504, f'No result within {self.timeout}s')
+        except ValueError as e:
+            return self.error(400, str(e))
+        except BackendError as e:
+            if 400 <= e.status < 500 and e.body:
+                # Client errors from the backend are passed through unchanged
+                return e.status, {'Access-Control-Allow-Origin': '*', 'Content-Type': 'application/json'}, e.body
+            return self.error(502, str(e))
+        except Exception as e:
+            return self.error(500, str(e))
+
+        self.stats['ok'] += 1
+        headers = {'Access-Control-Allow-Origin': '*', 'Content-Type': 'application/json'}
+        return 200, headers, result
+
+    def error(self, status, message):
+        if status >= 500:
+            self.stats['errors'] += 1
+        headers = {'Access-Control-Allow-Origin': '*', 'Content-Type': 'application/json'}
+        return status, headers, json.dumps({'error': message}).encode('utf-8')
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    message = await read_http_message(reader)
+                except OverflowError as e:
+                    await self.respond(writer, *self.error(413, str(e)), keep_alive=False)
+                    break
+                except (ValueError, asyncio.LimitOverrunError) as e:
+                    await self.respond(writer, *self.error(400, str(e) or 'Malformed request'), keep_alive=False)
+                    break
+                if message is None:
+                    break
+                request_line, headers, body = message
+                method = request_line.split(' ', 1)[0]
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self.respond(writer, *await self.handle(method, body), keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, headers, body, keep_alive=True):
+        head = [f'HTTP/1.1 {status} {REASONS.get(status, "")}']
+        headers = dict(headers, **{'Content-Length': str(len(body)),
+                                   'Connection': 'keep-alive' if keep_alive else 'close'})
+        head.extend(f'{name}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.serve_connection, host, port, limit=MAX_HEADER_BYTES)
+        print(f"🚀 Async proxy listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description='asyncio proxy for the loan scoring backend')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--backend', choices=['local', 'http'], default='local')
+    parser.add_argument('--model-dir', default=os.environ.get('SM_MODEL_DIR', 'artifacts'))
+    parser.add_argument('--backend-url', default='http://127.0.0.1:8080/invocations')
+    parser.add_argument('--pool-size', type=int, default=32)
+    parser.add_argument('--max-in-flight', type=int, default=256)
+    parser.add_argument('--max-queue', type=int, default=1024)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.backend == 'local':
+        backend = LocalBackend(args.model_dir)
+    else:
+        backend = HttpBackend(args.backend_url, args.pool_size)
+
+    proxy = AsyncProxy(backend, args.max_in_flight, args.max_queue, args.timeout)
+    try:
+        asyncio.run(proxy.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"Stopped: {proxy.stats}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+# Import and init cost of a fresh Lambda container and a fresh inference
+# worker. Every run is a new interpreter that times its own imports and
+# first requests and reports them as JSON; nothing is cached between runs
+# except by the OS page cache.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_ROOT, 'benchmarks')
+
+LAMBDA_PROBE = '''
+import json, sys, time
+clock = time.perf_counter
+timings = {}
+before = len(sys.modules)
+t = clock()
+import lambda_function as lf
+timings['lambda.import'] = clock() - t
+timings['modules'] = len(sys.modules) - before
+
+t = clock()
+lf.lambda_handler({'httpMethod': 'GET', 'headers': {'Accept': 'text/html', 'Accept-Encoding': 'gzip, br'}}, None)
+timings['lambda.first_get'] = clock() - t
+
+t = clock()
+lf.get_sagemaker_runtime()
+timings['lambda.client_setup'] = clock() - t
+
+# The endpoint itself is stood in for by the inference handlers, loaded outside the timings
+import inference
+from local_runtime import LocalSageMakerRuntime, post_event
+from synthetic import ApplicantGenerator
+lf.sagemaker_runtime = LocalSageMakerRuntime(inference, inference.model_fn(MODEL_DIR))
+event = post_event(ApplicantGenerator(DATA_FILE).applicant())
+t = clock()
+lf.lambda_handler(event, None)
+timings['lambda.first_post'] = clock() - t
+print(json.dumps(timings))
+'''
+
+INFERENCE_PROBE = '''
+import json, sys, time
+clock = time.perf_counter
+timings = {}
+t = clock()
+import inference
+timings['inference.import'] = clock() - t
+
+t = clock()
+engine = inference.model_fn(MODEL_DIR)
+timings['inference.model_fn'] = clock() - t
+
+body = json.dumps(APPLICATION)
+t = clock()
+inference.output_fn(inference.predict_fn(inference.input_fn(body, 'application/json'), engine), 'application/json')
+timings['inference.first_request'] = clock() - t
+timings['sklearn_loaded'] = 'sklearn' in sys.modules
+print(json.dumps(timings))
+'''
+
+def run_probe(probe, model_dir, data_file, application=None):
+    """Run a probe in a fresh interpreter and return its timings"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_ROOT, os.path.join(REPO_ROOT, 'code'), BENCH_DIR]),
+               AWS_DEFAULT_REGION=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+               METRICS_SAMPLE_RATE='0', LOG_LEVEL='WARNING')
+    source = (f"MODEL_DIR = {os.path.abspath(model_dir)!r}\nDATA_FILE = {os.path.abspath(data_file)!r}\n"
+              f"APPLICATION = {application!r}\n" + probe)
+    # Run from a neutral directory so nothing is imported from the caller's cwd
+    result = subprocess.run([sys.executable, '-c', source], env=env, cwd=tempfile.gettempdir(),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def cold_start(model_dir, data_file, runs=5):
+    """Per-stage cold-start stats (same shape as run_benchmarks stages) over runs fresh processes"""
+    from synthetic import ApplicantGenerator
+    application = ApplicantGenerator(data_file).applicant()
+
+    samples = {}
+    details = {}
+    for _ in range(runs):
+        for probe, app in ((LAMBDA_PROBE, None), (INFERENCE_PROBE, application)):
+            timings = run_probe(probe, model_dir, data_file, app)
+            for name, value in timings.items():
+                if isinstance(value, float):
+                    samples.setdefault(f'cold.{name}', []).append(value * 1000.0)
+                else:
+                    details[name] = value
+
+    stages = {}
+    for name, values in samples.items():
+        values = np.asarray(values)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        stages[name] = {'count': len(values), 'mean_ms': round(float(values.mean()), 3),
+                        'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+                        'p99_ms': round(float(p99), 3), 'min_ms': round(float(values.min()), 3)}
+    return stages, details
+
+def main():
+    sys.path.insert(0, BENCH_DIR)
+    from run_benchmarks import prepare_model
+
+    parser = argparse.ArgumentParser(description='Measure cold-start import and init cost')
+    parser.add_argument('--data', type=str, default=os.path.join(REPO_ROOT, 'data.csv'))
+    parser.add_argument('--model-dir', type=str, default=None, help='trained model; default trains one on --data')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    stages, details = cold_start(prepare_model(args.model_dir, args.data), args.data, args.runs)
+    for name, summary in stages.items():
+        print(f"{name:<32} p50 {summary['p50_ms']:>9.2f}  min {summary['min_ms']:>9.2f}  "
+              f"p95 {summary['p95_ms']:>9.2f} ms")
+    print(f"Modules imported by lambda_function: {details.get('modules')}, "
+          f"scikit-learn loaded by the inference worker: {details.get('sklearn_loaded')}")
+
+if __name__ == '__main__':
+    main()
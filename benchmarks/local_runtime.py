@@ -0,0 +1,54 @@
+import io
+import json
+import os
+import time
+
+# Local stand-ins for the AWS services the Lambda talks to, so the handler
+# can be benchmarked without network access or credentials.
+
+class LocalSageMakerRuntime:
+    """invoke_endpoint served in process by code/inference.py's handler chain"""
+
+    def __init__(self, inference, model, variant='local', latency_ms=0.0):
+        self.inference = inference
+        self.model = model
+        self.variant = variant
+        self.latency = latency_ms / 1000.0
+        self.invocations = 0
+
+    def invoke_endpoint(self, EndpointName, ContentType, Body, Accept=None):
+        self.invocations += 1
+        if self.latency:
+            time.sleep(self.latency)  # Simulated network round trip
+        data = self.inference.input_fn(Body, ContentType)
+        prediction = self.inference.predict_fn(data, self.model)
+        body = self.inference.output_fn(prediction, Accept or ContentType)
+        return {
+            'Body': io.BytesIO(body.encode('utf-8')),
+            'ContentType': ContentType,
+            'InvokedProductionVariant': self.variant,
+        }
+
+class LocalS3:
+    """get_object/head_object for a single model.json file, for the Lambda's local scoring mode"""
+
+    def __init__(self, model_json_path):
+        self.path = model_json_path
+
+    def _etag(self):
+        return f'"{os.stat(self.path).st_mtime_ns}"'
+
+    def head_object(self, Bucket, Key):
+        return {'ETag': self._etag()}
+
+    def get_object(self, Bucket, Key):
+        with open(self.path, 'rb') as f:
+            return {'Body': io.BytesIO(f.read()), 'ETag': self._etag()}
+
+def post_event(application):
+    """API Gateway proxy event for a scoring request"""
+    return {'httpMethod': 'POST', 'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps(application)}
+
+def get_event(accept_encoding='gzip, deflate, br', accept='text/html,application/xhtml+xml,*/*;q=0.8'):
+    return {'httpMethod': 'GET', 'headers': {'Accept-Encoding': accept_encoding, 'Accept': accept}}
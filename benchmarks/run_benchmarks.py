@@ -0,0 +1,308 @@
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import socket
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from cold_start import cold_start
+from local_runtime import LocalS3, LocalSageMakerRuntime, get_event, post_event
+from synthetic import ApplicantGenerator
+
+# Latency and throughput of the scoring path, stage by stage: the SageMaker
+# handlers in code/inference.py and the Lambda handler in front of them,
+# with the endpoint replaced by an in-process stand-in. Results are written
+# as JSON that capacity_planner.py reads and --compare diffs across commits.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'code'))
+sys.path.insert(0, REPO_ROOT)
+
+RESULT_FORMAT = 'loan-scorer-benchmark'  # capacity_planner.PROFILE_FORMAT
+RESULT_FORMAT_VERSION = 1
+DEFAULT_BATCH_SIZES = [1, 8, 32, 128, 512]
+
+def summarize(samples_ns, wall_seconds):
+    samples_ms = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        'count': len(samples_ms),
+        'throughput_rps': round(len(samples_ms) / wall_seconds, 1),
+        'mean_ms': round(float(samples_ms.mean()), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+    }
+
+def measure(fn, inputs, warmup):
+    """Time fn on every input after warmup calls; one sample per call"""
+    for item in inputs[:warmup]:
+        fn(item)
+    samples = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for item in inputs:
+        t0 = clock()
+        fn(item)
+        samples.append(clock() - t0)
+    return summarize(samples, (clock() - start) / 1e9)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def prepare_model(model_dir, data_file):
+    """Use model_dir, or train the standard batch model on data_file into a temp directory"""
+    if model_dir:
+        return model_dir
+    import joblib
+    from train import export_linear_model, train_in_memory
+
+    model_dir = tempfile.mkdtemp(prefix='loan-bench-model-')
+    with contextlib.redirect_stdout(io.StringIO()):
+        model, transform, _, _ = train_in_memory(data_file)
+        joblib.dump(model, os.path.join(model_dir, 'model.pkl'))
+        transform.save(model_dir)
+        export_linear_model(model, transform, model_dir)
+    return model_dir
+
+def bench_inference(inference, engine, model_dir, applicants, warmup, batch_sizes):
+    stages = {}
+    # Warm reloads of the artifact (imports already done; see the cold-start numbers for those)
+    with contextlib.redirect_stdout(io.StringIO()):
+        stages['inference.model_fn'] = measure(inference.model_fn, [model_dir] * 50, 5)
+    bodies = [json.dumps(a) for a in applicants]
+    parsed = [inference.input_fn(b, 'application/json') for b in bodies]
+    predictions = [inference.predict_fn(p, engine) for p in parsed]
+
+    stages['inference.input_fn'] = measure(lambda b: inference.input_fn(b, 'application/json'), bodies, warmup)
+    stages['inference.predict_fn'] = measure(lambda p: inference.predict_fn(p, engine), parsed, warmup)
+    stages['inference.output_fn'] = measure(lambda p: inference.output_fn(p, 'application/json'),
+                                            predictions, warmup)
+
+    def end_to_end(body):
+        data = inference.input_fn(body, 'application/json')
+        return inference.output_fn(inference.predict_fn(data, engine), 'application/json')
+    stages['inference.end_to_end'] = measure(end_to_end, bodies, warmup)
+
+    batch_latency = {}
+    for size in batch_sizes:
+        batches = [inference.input_fn(json.dumps(applicants[i:i + size]), 'application/json')
+                   for i in range(0, len(applicants) - size + 1, size)] or \
+                  [inference.input_fn(json.dumps((applicants * size)[:size]), 'application/json')]
+        # At least 50 timed calls per size, cycling through the batches
+        batches = (batches * (50 // len(batches) + 1))[:max(50, len(batches))]
+        summary = measure(lambda p: inference.predict_fn(p, engine), batches, min(warmup, len(batches)))
+        summary['rows_per_second'] = round(summary['throughput_rps'] * size, 1)
+        stages[f'inference.predict_fn.batch_{size}'] = summary
+        batch_latency[str(size)] = {'p50': summary['p50_ms'], 'p95': summary['p95_ms'], 'p99': summary['p99_ms']}
+    return stages, batch_latency
+
+def sample_metrics(recorder, sample_rate):
+    """Time a sample_rate fraction of requests into memory instead of stdout"""
+    from stage_metrics import MemorySink
+    recorder.sample_rate = sample_rate
+    recorder.sink = MemorySink()
+
+def bench_lambda(inference, engine, model_dir, applicants, warmup, endpoint_latency_ms, metrics_sample_rate):
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    with contextlib.redirect_stdout(io.StringIO()):
+        import lambda_function as lf
+    sample_metrics(lf.METRICS, metrics_sample_rate)
+
+    runtime = LocalSageMakerRuntime(inference, engine, latency_ms=endpoint_latency_ms)
+    lf.sagemaker_runtime = runtime
+    events = [post_event(a) for a in applicants]
+    stages = {}
+    sink = io.StringIO()
+
+    def handle(event):
+        sink.seek(0)
+        sink.truncate()
+        with contextlib.redirect_stdout(sink):
+            response = lf.lambda_handler(event, None)
+        if response['statusCode'] not in (200, 304):
+            raise RuntimeError(f"Lambda returned {response['statusCode']}: {response.get('body')}")
+        return response
+
+    # Every request reaches the (local) endpoint
+    lf.prediction_cache = lf.PredictionCache(0, 0)
+    stages['lambda.endpoint'] = measure(handle, events, warmup)
+
+    # The same application again and again
+    lf.prediction_cache = lf.PredictionCache(1024, 3600)
+    stages['lambda.cache_hit'] = measure(handle, [events[0]] * len(events), warmup)
+
+    # In-process scoring with the exported model.json
+    model_json = os.path.join(model_dir, 'model.json')
+    if os.path.exists(model_json):
+        lf.prediction_cache = lf.PredictionCache(0, 0)
+        lf.SCORING_MODE, lf.LOCAL_MODEL_URI = 'local', 's3://local/model.json'
+        lf._s3_client = LocalS3(model_json)
+        lf._local_model.update(scorer=None, etag=None, checked_at=None)
+        stages['lambda.local'] = measure(handle, events, warmup)
+        lf.SCORING_MODE = 'endpoint'
+
+    stages['lambda.static'] = measure(handle, [get_event()] * len(events), warmup)
+    return stages
+
+def bench_http(engine, applicants, warmup):
+    """POST /invocations to code/serve.py over a keep-alive loopback connection, one handler thread"""
+    import serve
+    serve.MODEL = engine
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(16)
+    server = serve.PooledHTTPServer(sock, 1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    conn = http.client.HTTPConnection('127.0.0.1', sock.getsockname()[1])
+    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+
+    def invoke(body):
+        conn.request('POST', '/invocations', body, headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"serve.py returned {response.status}")
+
+    try:
+        return {'serve.http': measure(invoke, [json.dumps(a) for a in applicants], warmup)}
+    finally:
+        conn.close()
+        server.shutdown()
+        server.pool.shutdown()
+        sock.close()
+
+def run(args):
+    generator = ApplicantGenerator(args.data, seed=args.seed)
+    applicants = generator.applicants(args.iterations)
+    model_dir = prepare_model(args.model_dir, args.data)
+
+    import inference
+    engine = inference.model_fn(model_dir)
+    # Version reported to the Lambda, which caches predictions per model version
+    inference.MODEL_VERSION = inference.MODEL_VERSION or 'benchmark'
+    sample_metrics(inference.METRICS, args.metrics_sample_rate)
+
+    stages, batch_latency = bench_inference(inference, engine, model_dir, applicants, args.warmup,
+                                            args.batch_sizes)
+    if not args.skip_http:
+        stages.update(bench_http(engine, applicants, args.warmup))
+    # Per-request cost outside the scorer: measured over HTTP unless given
+    request_overhead_ms = args.request_overhead_ms
+    if request_overhead_ms is None:
+        request_overhead_ms = 0.0
+        if 'serve.http' in stages:
+            request_overhead_ms = round(max(0.0, stages['serve.http']['p50_ms'] -
+                                            stages['inference.end_to_end']['p50_ms']), 4)
+    if not args.skip_lambda:
+        stages.update(bench_lambda(inference, engine, model_dir, applicants, args.warmup,
+                                   args.endpoint_latency_ms, args.metrics_sample_rate))
+
+    cold_start_details = {}
+    if args.cold_start_runs > 0:
+        cold_stages, cold_start_details = cold_start(model_dir, args.data, args.cold_start_runs)
+        stages.update(cold_stages)
+
+    import sklearn
+    return {
+        'format': RESULT_FORMAT,
+        'format_version': RESULT_FORMAT_VERSION,
+        'commit': git_commit(),
+        'created': time.time(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'settings': {'iterations': args.iterations, 'warmup': args.warmup, 'seed': args.seed,
+                     'model': type(engine.model).__name__ if engine.model is not None else 'model.json', 'endpoint_latency_ms': args.endpoint_latency_ms,
+                     'metrics_sample_rate': args.metrics_sample_rate},
+        'stages': stages,
+        'cold_start': cold_start_details,
+        # Capacity planner inputs: one benchmark thread is one core
+        'throughput_per_core_rps': stages['inference.end_to_end']['throughput_rps'],
+        'batch_latency_ms': batch_latency,
+        'request_overhead_ms': request_overhead_ms,
+    }
+
+def compare(result, baseline, max_regression):
+    """Print per-stage p50/p99 changes against a baseline; return the regressed stages"""
+    regressed = []
+    print(f"Stage comparison against {baseline.get('commit')} (regression threshold {max_regression:.0%})")
+    for stage, current in result['stages'].items():
+        before = baseline.get('stages', {}).get(stage)
+        if before is None:
+            print(f"  {stage:<36} new")
+            continue
+        changes = {q: current[q] / before[q] - 1 if before[q] else 0.0 for q in ('p50_ms', 'p99_ms')}
+        flag = ''
+        if changes['p50_ms'] > max_regression:
+            regressed.append(stage)
+            flag = '  ❌ regression'
+        print(f"  {stage:<36} p50 {before['p50_ms']:.4f} -> {current['p50_ms']:.4f} ms ({changes['p50_ms']:+.0%})  "
+              f"p99 {before['p99_ms']:.4f} -> {current['p99_ms']:.4f} ms ({changes['p99_ms']:+.0%}){flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the loan scoring path stage by stage')
+    parser.add_argument('--data', type=str, default=os.path.join(REPO_ROOT, 'data.csv'))
+    parser.add_argument('--model-dir', type=str, default=None, help='trained model; default trains one on --data')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES)
+    parser.add_argument('--endpoint-latency-ms', type=float, default=0.0,
+                        help='simulated network round trip added to every endpoint call')
+    parser.add_argument('--request-overhead-ms', type=float, default=None,
+                        help='per-request cost outside the scorer for the capacity planner; '
+                             'default is the serve.py HTTP p50 minus the in-process p50')
+    parser.add_argument('--metrics-sample-rate', type=float, default=0.0,
+                        help='fraction of requests the stage metrics time, to measure their overhead')
+    parser.add_argument('--cold-start-runs', type=int, default=5,
+                        help='fresh interpreters to time imports and first requests in; 0 skips')
+    parser.add_argument('--skip-lambda', action='store_true')
+    parser.add_argument('--skip-http', action='store_true')
+    parser.add_argument('--output', type=str, default=None)
+    parser.add_argument('--compare', type=str, default=None, help='baseline results JSON')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    args = parser.parse_args()
+
+    result = run(args)
+
+    for stage, summary in result['stages'].items():
+        rate = f"{summary['throughput_rps']:>10.1f} req/s" if 'throughput_rps' in summary else f"{'':>16}"
+        print(f"{stage:<36} {rate}  p50 {summary['p50_ms']:.4f}  "
+              f"p95 {summary['p95_ms']:.4f}  p99 {summary['p99_ms']:.4f} ms")
+
+    output = args.output or os.path.join(REPO_ROOT, 'benchmarks', 'results', f"{result['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"✅ Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(result, json.load(f), args.max_regression)
+        if regressed:
+            print(f"❌ {len(regressed)} stages regressed: {', '.join(regressed)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import csv
+import random
+
+# Synthetic loan applications drawn from the data.csv distribution. Each
+# applicant starts from a random real row, so income, loan amount and assets
+# stay correlated, and the money fields get a small log-normal jitter so
+# repeated draws are distinct. Same seed, same applicants.
+
+CATEGORY_FIELDS = ['education', 'self_employed']
+DISCRETE_FIELDS = ['no_of_dependents', 'loan_term']
+MONEY_FIELDS = ['income_annum', 'loan_amount', 'residential_assets_value', 'commercial_assets_value',
+                'luxury_assets_value', 'bank_asset_value']
+APPLICATION_FIELDS = ['no_of_dependents', 'education', 'self_employed', 'income_annum', 'loan_amount',
+                      'loan_term', 'credit_score', 'residential_assets_value', 'commercial_assets_value',
+                      'luxury_assets_value', 'bank_asset_value']
+
+def read_applications(data_file):
+    """Application fields of every row in data.csv (padded headers and labels stripped)"""
+    with open(data_file, newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        rows = []
+        for values in reader:
+            record = dict(zip(header, (v.strip() for v in values)))
+            try:
+                rows.append({
+                    field: record[field] if field in CATEGORY_FIELDS else int(record[field])
+                    for field in APPLICATION_FIELDS
+                })
+            except (KeyError, ValueError):
+                continue  # Malformed rows are not part of the distribution
+    return rows
+
+class ApplicantGenerator:
+    """Reproducible stream of synthetic applications"""
+
+    def __init__(self, data_file, seed=42, jitter=0.1):
+        self.rows = read_applications(data_file)
+        if not self.rows:
+            raise ValueError(f"No usable rows in {data_file}")
+        self.rng = random.Random(seed)
+        self.jitter = jitter
+
+    def applicant(self):
+        base = self.rng.choice(self.rows)
+        applicant = dict(base)
+        for field in DISCRETE_FIELDS + CATEGORY_FIELDS:
+            applicant[field] = self.rng.choice(self.rows)[field]
+        for field in MONEY_FIELDS:
+            applicant[field] = int(base[field] * self.rng.lognormvariate(0.0, self.jitter))
+        applicant['credit_score'] = min(900, max(300, base['credit_score'] + self.rng.randint(-25, 25)))
+        return applicant
+
+    def applicants(self, n):
+        return [self.applicant() for _ in range(n)]
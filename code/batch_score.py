@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from features import RAW_COLS, frame_to_raw
+from inference import model_fn
+
+# Offline counterpart of the endpoint: scores a whole applicant file chunk by
+# chunk. Each finished chunk is written to its own part file, so an
+# interrupted run picks up after the last chunk it completed.
+
+DEFAULT_CHUNK_ROWS = 100_000
+OUTPUT_COLS = ['prediction', 'loan_status', 'confidence']
+JOB_FILE = 'job.json'
+
+_engine = None
+
+def _load_engine(model_dir):
+    global _engine
+    _engine = model_fn(model_dir)
+
+def iter_input_chunks(input_file, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield DataFrames of at most chunk_rows applications from a CSV or Parquet file"""
+    if input_file.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet input needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(input_file).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        # skipinitialspace copes with the padded headers of the raw dataset
+        for chunk in pd.read_csv(input_file, chunksize=chunk_rows, skipinitialspace=True):
+            chunk.columns = chunk.columns.str.strip()
+            yield chunk
+
+def score_frame(engine, df, id_col=None):
+    """Score one chunk; rows with missing or unknown values are reported as Invalid"""
+    missing = [col for col in RAW_COLS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    raw = frame_to_raw(df)
+    valid = ~np.isnan(raw).any(axis=1)
+
+    prediction = np.full(len(df), -1, dtype=np.int64)
+    confidence = np.full(len(df), np.nan)
+    if valid.any():
+        labels, probability = engine.predict_proba(raw[valid])
+        prediction[valid] = labels
+        confidence[valid] = probability.max(axis=1)
+
+    out = pd.DataFrame({
+        'prediction': prediction,
+        'loan_status': np.where(prediction == 1, 'Approved', np.where(valid, 'Rejected', 'Invalid')),
+        'confidence': confidence
+    })
+    if id_col:
+        out.insert(0, id_col, df[id_col].to_numpy())
+    return out
+
+def part_path(parts_dir, index):
+    return os.path.join(parts_dir, f'part-{index:05d}.csv')
+
+def score_chunk(index, df, parts_dir, id_col=None):
+    """Score one chunk and write its part file atomically; runs in a pool worker"""
+    out = score_frame(_engine, df, id_col)
+    path = part_path(parts_dir, index)
+    out.to_csv(path + '.tmp', header=False, index=False)
+    os.replace(path + '.tmp', path)
+    return index, len(out), int((out['loan_status'] == 'Invalid').sum())
+
+def prepare_parts_dir(parts_dir, job):
+    """Keep finished parts only if they belong to the same input, model and chunking"""
+    job_file = os.path.join(parts_dir, JOB_FILE)
+    if os.path.exists(job_file):
+        with open(job_file) as f:
+            if json.load(f) == job:
+                return
+        print(f"⚠️ {parts_dir} holds parts from a different job, starting over")
+        shutil.rmtree(parts_dir)
+    os.makedirs(parts_dir, exist_ok=True)
+    with open(job_file, 'w') as f:
+        json.dump(job, f, indent=2)
+
+def merge_parts(parts_dir, chunks, output_file, columns):
+    with open(output_file, 'w', newline='') as out:
+        out.write(','.join(columns) + '\n')
+        for index in range(chunks):
+            with open(part_path(parts_dir, index)) as part:
+                shutil.copyfileobj(part, out)
+
+def batch_score(input_file, output_file, model_dir, chunk_rows=DEFAULT_CHUNK_ROWS,
+                workers=None, id_col='loan_id', keep_parts=False):
+    """Score every application in input_file and write predictions plus confidence to output_file"""
+    workers = workers or os.cpu_count() or 1
+    parts_dir = output_file + '.parts'
+    stat = os.stat(input_file)
+    prepare_parts_dir(parts_dir, {
+        'input': os.path.abspath(input_file), 'size': stat.st_size, 'mtime': stat.st_mtime,
+        'model_dir': os.path.abspath(model_dir), 'chunk_rows': chunk_rows, 'id_col': id_col
+    })
+
+    rows = invalid = skipped = chunks = 0
+    columns = OUTPUT_COLS
+
+    def collect(result):
+        nonlocal rows, invalid
+        _, n, bad = result
+        rows += n
+        invalid += bad
+
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=_load_engine, initargs=(model_dir,))
+    else:
+        pool = None
+        _load_engine(model_dir)
+
+    pending = []
+    try:
+        for index, df in enumerate(iter_input_chunks(input_file, chunk_rows)):
+            chunks += 1
+            chunk_id_col = id_col if id_col in df.columns else None
+            columns = ([chunk_id_col] if chunk_id_col else []) + OUTPUT_COLS
+            if os.path.exists(part_path(parts_dir, index)):
+                skipped += 1
+                rows += len(df)
+                continue
+            if pool is None:
+                collect(score_chunk(index, df, parts_dir, chunk_id_col))
+                continue
+            pending.append(pool.submit(score_chunk, index, df, parts_dir, chunk_id_col))
+            # Bound the chunks held in memory while workers catch up
+            if len(pending) >= 2 * workers:
+                collect(pending.pop(0).result())
+        for future in pending:
+            collect(future.result())
+    finally:
+        if pool is not None:
+            # Drop queued chunks on failure (shutdown(cancel_futures=) needs Python 3.9)
+            for future in pending:
+                future.cancel()
+            pool.shutdown()
+
+    merge_parts(parts_dir, chunks, output_file, columns)
+    if not keep_parts:
+        shutil.rmtree(parts_dir)
+
+    print(f"✅ Scored {rows} applications in {chunks} chunks and saved to {output_file}")
+    if skipped:
+        print(f"↩️ Resumed: reused {skipped} finished chunks")
+    if invalid:
+        print(f"⚠️ {invalid} rows had missing or unknown values and were marked Invalid")
+    return {'rows': rows, 'chunks': chunks, 'resumed_chunks': skipped, 'invalid': invalid}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a CSV/Parquet file of loan applications offline')
+    parser.add_argument('input', type=str)
+    parser.add_argument('output', type=str)
+    parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR', '/opt/ml/model'))
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--id-col', type=str, default='loan_id')
+    parser.add_argument('--keep-parts', action='store_true')
+    args = parser.parse_args()
+
+    batch_score(args.input, args.output, args.model_dir, args.chunk_rows,
+                args.workers, args.id_col, args.keep_parts)
@@ -0,0 +1,96 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into one vectorized call.
+
+    Callers submit raw matrices from any thread. A single worker thread
+    takes the first waiting request, keeps collecting until max_wait_ms
+    has passed or max_batch_rows rows are queued, scores them all with one
+    score_batch call and hands each caller back its own slice. The worker
+    starts on first use, so every forked server process gets its own.
+    """
+
+    def __init__(self, score_batch, max_batch_rows=64, max_wait_ms=5.0, max_queue=10000):
+        self.score_batch = score_batch
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = {'requests': 0, 'rows': 0, 'batches': 0, 'largest_batch': 0}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._worker.start()
+
+    def submit(self, raw):
+        """Queue a raw matrix; the Future resolves to its (labels, probabilities)"""
+        self._ensure_worker()
+        future = Future()
+        # Raises queue.Full when the backlog is at max_queue
+        self._queue.put_nowait((raw, future))
+        return future
+
+    def score(self, raw, timeout=None):
+        return self.submit(raw).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch, rows
+
+    def _run(self):
+        while True:
+            try:
+                self._score(*self._collect())
+            except Exception:
+                pass  # Never let the worker die; callers already got their exception
+
+    def _score(self, batch, rows):
+        # Claim the futures; ones cancelled while queued (a caller's deadline) are dropped
+        live = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not live:
+            return
+        if len(live) < len(batch):
+            rows = sum(len(item[0]) for item in live)
+        self.stats['requests'] += len(live)
+        self.stats['rows'] += rows
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], rows)
+
+        try:
+            raw = live[0][0] if len(live) == 1 else np.concatenate([item[0] for item in live])
+            labels, probability = self.score_batch(raw)
+        except Exception as e:
+            for _, future in live:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for item_raw, future in live:
+            stop = start + len(item_raw)
+            future.set_result((labels[start:stop], probability[start:stop]))
+            start = stop
@@ -0,0 +1,98 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from features import FEATURE_COLS
+
+# Engineered dataset written by preprocessing.py and memory-mapped by
+# train.py and evaluate.py: one .npy file per column group plus a schema
+# header, so the same rows are never text-parsed twice.
+DATASET_FORMAT = 'loan-features'
+DATASET_VERSION = 1
+SCHEMA_FILE = 'schema.json'
+FEATURES_FILE = 'features.npy'
+LABELS_FILE = 'labels.npy'
+FEATURE_DTYPE = np.float32
+LABEL_DTYPE = np.int8
+# Fixed .npy header size, so the row count can be filled in once all rows are written
+NPY_HEADER_BYTES = 128
+
+def has_dataset(path):
+    return os.path.exists(os.path.join(path, SCHEMA_FILE))
+
+def npy_header(dtype, shape):
+    """Version 1.0 .npy header of exactly NPY_HEADER_BYTES bytes"""
+    header = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                   'fortran_order': False, 'shape': tuple(shape)})
+    header = header.ljust(NPY_HEADER_BYTES - 11) + '\n'
+    return np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + struct.pack('<H', len(header)) + header.encode('latin1')
+
+class DatasetWriter:
+    """Appends engineered feature chunks to a dataset directory.
+
+    Rows go straight to features.npy and labels.npy behind a reserved
+    header, so memory is bounded by the chunk size rather than the
+    dataset size; close() fills in the row count and writes the schema.
+    """
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.rows = 0
+        self.features = open(os.path.join(path, FEATURES_FILE), 'wb')
+        self.labels = open(os.path.join(path, LABELS_FILE), 'wb')
+        for f in (self.features, self.labels):
+            f.write(b'\0' * NPY_HEADER_BYTES)
+
+    def append(self, features, labels):
+        features = np.ascontiguousarray(features, dtype=FEATURE_DTYPE)
+        labels = np.ascontiguousarray(labels, dtype=LABEL_DTYPE)
+        if features.shape != (len(labels), len(FEATURE_COLS)):
+            raise ValueError(f"Expected {len(labels)} x {len(FEATURE_COLS)} features, got {features.shape}")
+        self.features.write(features.tobytes())
+        self.labels.write(labels.tobytes())
+        self.rows += len(labels)
+
+    def close(self):
+        for f, dtype, shape in ((self.features, FEATURE_DTYPE, (self.rows, len(FEATURE_COLS))),
+                                (self.labels, LABEL_DTYPE, (self.rows,))):
+            f.seek(0)
+            f.write(npy_header(dtype, shape))
+            f.close()
+
+        schema = {
+            'format': DATASET_FORMAT,
+            'version': DATASET_VERSION,
+            'rows': self.rows,
+            'feature_cols': FEATURE_COLS,
+            'features': {'file': FEATURES_FILE, 'dtype': np.dtype(FEATURE_DTYPE).name},
+            'labels': {'file': LABELS_FILE, 'dtype': np.dtype(LABEL_DTYPE).name, 'name': 'loan_status'},
+        }
+        # Written last so a half-written dataset is never picked up
+        with open(os.path.join(self.path, SCHEMA_FILE), 'w') as f:
+            json.dump(schema, f, indent=2)
+
+def write_dataset(path, features, labels):
+    """Write engineered features (float32) and labels (int8) with a schema header"""
+    writer = DatasetWriter(path)
+    writer.append(features, labels)
+    writer.close()
+
+def read_dataset(path, mmap=True):
+    """Return (features, labels) from a dataset directory, memory-mapped by default"""
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+
+    if schema.get('format') != DATASET_FORMAT or schema.get('version') != DATASET_VERSION:
+        raise ValueError(f"Unsupported dataset in {path}: {schema.get('format')} v{schema.get('version')}")
+    if schema['feature_cols'] != FEATURE_COLS:
+        raise ValueError(f"Dataset feature columns {schema['feature_cols']} do not match {FEATURE_COLS}")
+
+    mmap_mode = 'r' if mmap else None
+    features = np.load(os.path.join(path, schema['features']['file']), mmap_mode=mmap_mode)
+    labels = np.load(os.path.join(path, schema['labels']['file']), mmap_mode=mmap_mode)
+    if len(features) != schema['rows'] or len(labels) != schema['rows']:
+        raise ValueError(f"Dataset in {path} is truncated: expected {schema['rows']} rows")
+    return features, labels
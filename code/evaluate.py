@@ -1,10 +1,28 @@
 import pandas as pd
+import numpy as np
 import joblib
 import json
 import argparse
 import os
 from sklearn.metrics import accuracy_score, f1_score
 
+from dataset import has_dataset, read_dataset
+from features import FEATURE_COLS, FeatureTransform
+
+def evaluation_report(accuracy, f1):
+    """Metrics plus the approval decision, as stored in evaluation.json"""
+    return {
+        "metrics": {
+            "accuracy": float(accuracy),
+            "f1_score": float(f1)
+        },
+        "approval_criteria": {
+            "min_accuracy": 0.7,
+            "min_f1_score": 0.7
+        },
+        "approved": bool(accuracy >= 0.7 and f1 >= 0.7)
+    }
+
 def evaluate_model():
     parser = argparse.ArgumentParser()
     parser.add_argument('--model-path', type=str, default='/opt/ml/processing/model')
@@ -13,13 +31,17 @@ def evaluate_model():
     
     args = parser.parse_args()
     
-    # Load test data
-    test_df = pd.read_csv(f"{args.test_path}/test.csv")
-    X_test = test_df.drop('loan_status', axis=1)
-    y_test = test_df['loan_status']
+    # Load test data (memory-mapped dataset, or test.csv from older runs)
+    if has_dataset(args.test_path):
+        X_test, y_test = read_dataset(args.test_path)
+    else:
+        test_df = pd.read_csv(f"{args.test_path}/test.csv")
+        X_test, y_test = test_df[FEATURE_COLS].to_numpy(), test_df['loan_status'].to_numpy()
     
-    # Load model
+    # Load model and the feature transform it was trained with
     model = joblib.load(f"{args.model_path}/model.pkl")
+    transform = FeatureTransform.load(args.model_path)
+    X_test = transform.scale(np.array(X_test, dtype=np.float64))
     
     # Make predictions
     y_pred = model.predict(X_test)
@@ -29,17 +51,7 @@ def evaluate_model():
     f1 = f1_score(y_test, y_pred)
     
     # Evaluation report
-    report = {
-        "metrics": {
-            "accuracy": accuracy,
-            "f1_score": f1
-        },
-        "approval_criteria": {
-            "min_accuracy": 0.7,
-            "min_f1_score": 0.7
-        },
-        "approved": accuracy >= 0.7 and f1 >= 0.7
-    }
+    report = evaluation_report(accuracy, f1)
     
     print(f"Accuracy: {accuracy:.4f}")
     print(f"F1 Score: {f1:.4f}")
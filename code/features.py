@@ -0,0 +1,189 @@
+import json
+import os
+
+import numpy as np
+
+# Raw application fields, in the column order of the raw matrix
+ASSET_COLS = ['residential_assets_value', 'commercial_assets_value',
+              'luxury_assets_value', 'bank_asset_value']
+RAW_COLS = ['no_of_dependents', 'education', 'self_employed', 'income_annum',
+            'loan_amount', 'loan_term', 'credit_score'] + ASSET_COLS
+
+# Engineered features, in the order the model is trained on
+FEATURE_COLS = ['no_of_dependents', 'education', 'self_employed', 'income_annum',
+                'loan_amount', 'loan_term', 'credit_score', 'total_assets']
+LOG_COLS = ['income_annum', 'loan_amount', 'total_assets']
+
+EDUCATION_MAP = {'Graduate': 0, 'Not Graduate': 1}
+SELF_EMPLOYED_MAP = {'No': 0, 'Yes': 1}
+LOAN_STATUS_MAP = {'Rejected': 0, 'Approved': 1}
+CATEGORY_MAPS = {'education': EDUCATION_MAP, 'self_employed': SELF_EMPLOYED_MAP}
+
+TRANSFORM_FILE = 'features.json'
+
+# Column indices, resolved once
+_RAW_IDX = {col: i for i, col in enumerate(RAW_COLS)}
+_COPY_IDX = [(FEATURE_COLS.index(col), _RAW_IDX[col])
+             for col in FEATURE_COLS if col in _RAW_IDX]
+_ASSET_SLICE = slice(_RAW_IDX[ASSET_COLS[0]], _RAW_IDX[ASSET_COLS[-1]] + 1)
+_TOTAL_IDX = FEATURE_COLS.index('total_assets')
+_LOG_IDX = [FEATURE_COLS.index(col) for col in LOG_COLS]
+
+def encode_category(field, value):
+    """Map an education/self_employed label to its numeric code"""
+    try:
+        return CATEGORY_MAPS[field][value.strip()]
+    except (KeyError, AttributeError):
+        raise ValueError(f"Invalid value for {field}: {value!r}")
+
+def records_to_raw(records):
+    """Build the float64 raw matrix (RAW_COLS order) from application dicts"""
+    raw = np.zeros((len(records), len(RAW_COLS)), dtype=np.float64)
+    for row, record in zip(raw, records):
+        if 'total_asset' in record and not all(col in record for col in ASSET_COLS):
+            # Fallback for old structure: a single pre-summed asset value
+            cols = RAW_COLS[:_ASSET_SLICE.start]
+            row[_ASSET_SLICE.start] = record['total_asset']
+        else:
+            cols = RAW_COLS
+        for i, col in enumerate(cols):
+            if col not in record:
+                raise ValueError(f"Missing field: {col}")
+            if col in CATEGORY_MAPS:
+                row[i] = encode_category(col, record[col])
+            else:
+                row[i] = record[col]
+    return raw
+
+def frame_to_raw(df):
+    """Build the float64 raw matrix (RAW_COLS order) from a DataFrame.
+
+    Unknown categories and non-numeric values become NaN, for the caller
+    to treat as invalid rows.
+    """
+    import pandas as pd
+
+    raw = np.empty((len(df), len(RAW_COLS)), dtype=np.float64)
+    for i, col in enumerate(RAW_COLS):
+        values = df[col]
+        if col in CATEGORY_MAPS and values.dtype.kind not in 'biuf':
+            values = values.str.strip().map(CATEGORY_MAPS[col])
+        raw[:, i] = pd.to_numeric(values, errors='coerce')
+    return raw
+
+class FeatureTransform:
+    """Shared feature engineering for preprocessing, training and inference.
+
+    engineer() turns a raw matrix into the model features: categorical
+    codes and plain numerics are copied, the four asset columns are summed
+    into total_assets and income_annum, loan_amount and total_assets get
+    log(|x| + 1). fit() records per-feature statistics of the engineered
+    features, either in one go or chunk by chunk with partial_fit(); when
+    standardize is set, transform() also centres and scales with them.
+    The fitted state is saved as features.json next to model.pkl.
+    """
+
+    version = 1
+
+    def __init__(self, standardize=False, mean=None, scale=None, n_samples=0):
+        self.standardize = standardize
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale_ = None if scale is None else np.asarray(scale, dtype=np.float64)
+        self.n_samples = n_samples
+        # Running sum of squared deviations, rebuilt from scale_ for loaded transforms
+        self._m2 = None if self.scale_ is None else self.scale_ ** 2 * n_samples
+
+    def engineer(self, raw):
+        """Engineered (unscaled) features for a raw matrix"""
+        raw = np.asarray(raw, dtype=np.float64)
+        out = np.empty((raw.shape[0], len(FEATURE_COLS)), dtype=np.float64)
+        for dst, src in _COPY_IDX:
+            out[:, dst] = raw[:, src]
+        np.sum(raw[:, _ASSET_SLICE], axis=1, out=out[:, _TOTAL_IDX])
+        for idx in _LOG_IDX:
+            col = out[:, idx]
+            np.abs(col, out=col)
+            np.log1p(col, out=col)
+        return out
+
+    def scale(self, features):
+        """Standardize engineered features in place (no-op unless enabled)"""
+        if self.standardize and self.mean is not None:
+            features -= self.mean
+            features /= self.scale_
+        return features
+
+    def transform(self, raw):
+        """Model-ready features for a raw matrix"""
+        return self.scale(self.engineer(raw))
+
+    def fit(self, raw):
+        """Record feature statistics from a raw matrix"""
+        return self.fit_features(self.engineer(raw))
+
+    def fit_features(self, features):
+        """Record feature statistics from already engineered features"""
+        self.mean = None
+        self.n_samples = 0
+        return self.partial_fit_features(features)
+
+    def partial_fit(self, raw):
+        """Fold another chunk of raw rows into the running feature statistics"""
+        return self.partial_fit_features(self.engineer(raw))
+
+    def partial_fit_features(self, features):
+        """Fold another chunk of engineered features into the running statistics"""
+        features = np.asarray(features, dtype=np.float64)
+        n = features.shape[0]
+        if n == 0:
+            return self
+        chunk_mean = features.mean(axis=0)
+        chunk_m2 = ((features - chunk_mean) ** 2).sum(axis=0)
+
+        if self.mean is None or self.n_samples == 0:
+            self.mean, self._m2, total = chunk_mean, chunk_m2, n
+        else:
+            # Chan et al. pairwise update of mean and sum of squared deviations
+            total = self.n_samples + n
+            delta = chunk_mean - self.mean
+            self._m2 = self._m2 + chunk_m2 + delta ** 2 * self.n_samples * n / total
+            self.mean = self.mean + delta * n / total
+
+        std = np.sqrt(self._m2 / total)
+        self.scale_ = np.where(std > 0, std, 1.0)
+        self.n_samples = int(total)
+        return self
+
+    def fit_transform(self, raw):
+        return self.fit(raw).transform(raw)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'feature_cols': FEATURE_COLS,
+            'log_cols': LOG_COLS,
+            'standardize': self.standardize,
+            'mean': None if self.mean is None else self.mean.tolist(),
+            'scale': None if self.scale_ is None else self.scale_.tolist(),
+            'n_samples': self.n_samples,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != cls.version or data.get('feature_cols') != FEATURE_COLS:
+            raise ValueError(f"Unsupported feature transform: version {data.get('version')}")
+        return cls(standardize=data['standardize'], mean=data['mean'],
+                   scale=data['scale'], n_samples=data['n_samples'])
+
+    def save(self, model_dir):
+        with open(os.path.join(model_dir, TRANSFORM_FILE), 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, model_dir):
+        """Load the transform saved next to model.pkl, or the default one for older models"""
+        path = os.path.join(model_dir, TRANSFORM_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
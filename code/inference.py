@@ -1,70 +1,168 @@
-import joblib
-import pandas as pd
 import numpy as np
 import json
 import os
 
+from features import FeatureTransform, records_to_raw
+from batching import MicroBatcher
+from linear_scorer import MODEL_FORMAT, MODEL_FORMAT_VERSION, MODEL_JSON, is_logistic
+from stage_metrics import NULL_TIMER, MetricsRecorder
+
+JSON_LINES_TYPES = ('application/jsonlines', 'application/x-jsonlines', 'application/jsonl')
+
+# Request coalescing window; 0 scores every request on its own thread
+MICRO_BATCH_WAIT_MS = float(os.environ.get('MICRO_BATCH_WAIT_MS', '0'))
+MICRO_BATCH_MAX_ROWS = int(os.environ.get('MICRO_BATCH_MAX_ROWS', '64'))
+
+# Sampled per-stage timings of each request, started in input_fn and
+# emitted by output_fn (the container calls the handlers on one thread)
+MODEL_VERSION = os.environ.get('MODEL_VERSION')
+METRICS = MetricsRecorder('inference')
+
+class ScoringEngine:
+    """Wraps a fitted classifier with a single-pass probability scorer.
+
+    Raw application rows go through the FeatureTransform saved with the
+    model. For the binary logistic models saved by train.py
+    (LogisticRegression, or SGDClassifier with log loss from the
+    incremental mode) the coefficients are extracted once and rows are
+    scored with a dot product, skipping sklearn's input validation. Any
+    other estimator falls back to its own predict_proba.
+
+    An engine built from_spec() has no estimator at all: the coefficients
+    come from model.json and only NumPy is needed to score.
+
+    When MICRO_BATCH_WAIT_MS is set, concurrent requests in the same
+    process are coalesced by a MicroBatcher into one scoring call.
+    """
+
+    def __init__(self, model, transform=None, coef=None, intercept=0.0, classes=None):
+        self.model = model
+        self.transform = transform or FeatureTransform()
+        self.classes_ = np.asarray(model.classes_ if model is not None else classes)
+        self.coef = None if coef is None else np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        if model is not None and is_logistic(model) and len(self.classes_) == 2:
+            self.coef = np.ascontiguousarray(model.coef_[0], dtype=np.float64)
+            self.intercept = float(model.intercept_[0])
+        self.batcher = None
+        if MICRO_BATCH_WAIT_MS > 0:
+            self.batcher = MicroBatcher(self.predict_proba, MICRO_BATCH_MAX_ROWS, MICRO_BATCH_WAIT_MS)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Engine for a model.json spec written by train.export_linear_model"""
+        if spec.get('format') != MODEL_FORMAT or spec.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model spec: {spec.get('format')} v{spec.get('format_version')}")
+        if len(spec['classes']) != 2 or len(spec['coef']) != len(spec['feature_cols']):
+            raise ValueError("Model spec is not a binary linear model over its feature columns")
+        return cls(None, FeatureTransform.from_dict(spec['transform']),
+                   coef=spec['coef'], intercept=spec['intercept'], classes=spec['classes'])
+
+    def predict_proba(self, raw):
+        """Return (labels, probabilities) for a raw matrix from one scoring pass"""
+        X = self.transform.transform(raw)
+        if self.coef is None:
+            probability = self.model.predict_proba(X)
+            return self.classes_[np.argmax(probability, axis=1)], probability
+
+        z = X @ self.coef + self.intercept
+        positive = 1.0 / (1.0 + np.exp(-z))
+        probability = np.empty((len(z), 2))
+        probability[:, 0] = 1.0 - positive
+        probability[:, 1] = positive
+        # Same decision rule as the linear models' predict
+        return self.classes_[(z > 0).astype(np.intp)], probability
+
 def model_fn(model_dir):
-    """Load model from the model_dir"""
+    """Load model from the model_dir.
+
+    Prefers model.json, which loads with the standard library and scores
+    with NumPy; joblib (and through the pickle, scikit-learn) is only
+    imported for models without one, e.g. non-linear search winners.
+    """
+    spec_path = os.path.join(model_dir, MODEL_JSON)
+    if os.path.exists(spec_path):
+        try:
+            with open(spec_path) as f:
+                return ScoringEngine.from_spec(json.load(f))
+        except (ValueError, KeyError) as e:
+            print(f"⚠️ Cannot use {MODEL_JSON}, loading model.pkl instead: {e}")
+
+    import joblib
     model = joblib.load(os.path.join(model_dir, "model.pkl"))
-    return model
+    return ScoringEngine(model, FeatureTransform.load(model_dir))
+
+def parse_records(request_body, request_content_type):
+    """Parse a request body into a list of application records.
+
+    Returns (records, batch) where batch is False when the body held a
+    single JSON object, so the response keeps the single-record shape.
+    """
+    if isinstance(request_body, (bytes, bytearray)):
+        request_body = request_body.decode('utf-8')
+
+    if request_content_type in JSON_LINES_TYPES:
+        records = [json.loads(line) for line in request_body.splitlines() if line.strip()]
+        return records, True
+
+    input_data = json.loads(request_body)
+    if isinstance(input_data, list):
+        return input_data, True
+    return [input_data], False
 
 def input_fn(request_body, request_content_type):
     """Parse input data for predictions"""
-    if request_content_type == 'application/json':
-        input_data = json.loads(request_body)
-        df = pd.DataFrame([input_data])
-        
-        # Feature engineering
-        if 'education' in df.columns:
-            df['education'] = df['education'].str.strip().map({'Graduate': 0, 'Not Graduate': 1})
-        if 'self_employed' in df.columns:
-            df['self_employed'] = df['self_employed'].str.strip().map({'No': 0, 'Yes': 1})
-        
-        # Calculate total assets if individual asset columns exist
-        if all(col in df.columns for col in ['residential_assets_value', 'commercial_assets_value', 'luxury_assets_value', 'bank_asset_value']):
-            df['total_assets'] = (df['residential_assets_value'] + 
-                                 df['commercial_assets_value'] + 
-                                 df['luxury_assets_value'] + 
-                                 df['bank_asset_value'])
-            
-            # Log transform
-            numerical_cols = ['income_annum', 'loan_amount', 'total_assets']
-            for col in numerical_cols:
-                if col in df.columns:
-                    df[col] = np.log(df[col] + 1)
-            
-            # Select features
-            feature_cols = ['no_of_dependents', 'education', 'self_employed', 'income_annum', 
-                           'loan_amount', 'loan_term', 'credit_score', 'total_assets']
-        else:
-            # Fallback for old structure
-            numerical_cols = ['income_annum', 'loan_amount', 'total_asset']
-            for col in numerical_cols:
-                if col in df.columns:
-                    df[col] = np.log(df[col] + 1)
-            
-            feature_cols = ['no_of_dependents', 'education', 'self_employed', 'income_annum', 
-                           'loan_amount', 'loan_term', 'credit_score', 'total_asset']
-        
-        return df[feature_cols]
+    if request_content_type == 'application/json' or request_content_type in JSON_LINES_TYPES:
+        timer = METRICS.start(model_version=MODEL_VERSION)
+        records, batch = parse_records(request_body, request_content_type)
+        timer.lap('parse')
+        raw = records_to_raw(records)
+        timer.lap('features')
+        timer.set('rows', len(records))
+        # The timer travels with the request rather than in a thread-local,
+        # since async front ends interleave requests on one thread
+        return {"raw": raw, "batch": batch, "timer": timer}
     else:
         raise ValueError(f"Unsupported content type: {request_content_type}")
 
 def predict_fn(input_data, model):
     """Make predictions using the loaded model"""
-    prediction = model.predict(input_data)
-    probability = model.predict_proba(input_data)
-    return {"prediction": prediction, "probability": probability}
+    if not isinstance(model, ScoringEngine):
+        model = ScoringEngine(model)
+    timer = input_data.get("timer", NULL_TIMER)
+    timer.mark()
+    if model.batcher is not None:
+        prediction, probability = model.batcher.score(input_data["raw"])
+    else:
+        prediction, probability = model.predict_proba(input_data["raw"])
+    timer.lap('predict')
+    return {"prediction": prediction, "probability": probability, "batch": input_data["batch"], "timer": timer}
+
+def format_result(label, probability):
+    """Build the response record for one scored application"""
+    result = {
+        "prediction": int(label),
+        "loan_status": "Approved" if label == 1 else "Rejected",
+        "confidence": float(max(probability))
+    }
+    if MODEL_VERSION:
+        # Lets callers (the Lambda's prediction cache) tell models apart
+        result["model_version"] = MODEL_VERSION
+    return result
 
 def output_fn(prediction, content_type):
     """Format the output"""
-    if content_type == 'application/json':
-        result = {
-            "prediction": int(prediction["prediction"][0]),
-            "loan_status": "Approved" if prediction["prediction"][0] == 1 else "Rejected",
-            "confidence": float(max(prediction["probability"][0]))
-        }
-        return json.dumps(result)
+    timer = prediction.get("timer", NULL_TIMER)
+    timer.mark()
+    results = [format_result(label, probability)
+               for label, probability in zip(prediction["prediction"], prediction["probability"])]
+
+    if content_type in JSON_LINES_TYPES:
+        body = "".join(json.dumps(result) + "\n" for result in results)
+    elif content_type == 'application/json':
+        body = json.dumps(results[0] if not prediction.get("batch", False) else results)
     else:
-        raise ValueError(f"Unsupported content type: {content_type}")
\ No newline at end of file
+        raise ValueError(f"Unsupported content type: {content_type}")
+    timer.lap('serialize')
+    timer.emit()
+    return body
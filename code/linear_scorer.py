@@ -0,0 +1,85 @@
+import json
+import math
+
+# Compact, dependency-free form of a trained logistic model. train.py writes
+# it as model.json next to model.pkl; the Lambda scores with it in process.
+MODEL_JSON = 'model.json'
+MODEL_FORMAT = 'loan-linear-model'
+MODEL_FORMAT_VERSION = 1
+
+def is_logistic(model):
+    """True for fitted linear models whose predict_proba is sigmoid(X @ coef + intercept)"""
+    name = type(model).__name__
+    return name == 'LogisticRegression' or (name == 'SGDClassifier' and model.loss in ('log', 'log_loss'))
+
+class LinearScorer:
+    """Scores one application dict with plain Python floats.
+
+    Applies the same feature engineering as features.FeatureTransform
+    (category codes, summed assets, log(|x| + 1), optional standardization)
+    using the maps and statistics stored in the spec, then the logistic
+    function of the exported coefficients.
+    """
+
+    def __init__(self, spec):
+        if spec.get('format') != MODEL_FORMAT or spec.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model spec: {spec.get('format')} v{spec.get('format_version')}")
+        transform = spec['transform']
+        self.model_version = spec.get('model_version')
+        self.feature_cols = spec['feature_cols']
+        self.asset_cols = spec['asset_cols']
+        self.category_maps = spec['category_maps']
+        self.log_cols = set(transform['log_cols'])
+        self.coef = [float(c) for c in spec['coef']]
+        self.intercept = float(spec['intercept'])
+        self.classes = spec['classes']
+        if transform['standardize']:
+            self.mean = [float(m) for m in transform['mean']]
+            self.scale = [float(s) for s in transform['scale']]
+        else:
+            self.mean = self.scale = None
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(json.loads(text))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def features(self, record):
+        """Model-ready feature list for one application"""
+        if all(col in record for col in self.asset_cols):
+            total_assets = sum(float(record[col]) for col in self.asset_cols)
+        else:
+            # Fallback for old structure
+            total_assets = float(record['total_asset'])
+
+        values = []
+        for col in self.feature_cols:
+            if col == 'total_assets':
+                value = total_assets
+            elif col in self.category_maps:
+                try:
+                    value = float(self.category_maps[col][record[col].strip()])
+                except (KeyError, AttributeError):
+                    raise ValueError(f"Invalid value for {col}: {record.get(col)!r}")
+            else:
+                value = float(record[col])
+            if col in self.log_cols:
+                value = math.log1p(abs(value))
+            values.append(value)
+
+        if self.mean is not None:
+            values = [(v - m) / s for v, m, s in zip(values, self.mean, self.scale)]
+        return values
+
+    def predict(self, record):
+        """Return (label, [p_class0, p_class1]) for one application"""
+        z = self.intercept + sum(c * v for c, v in zip(self.coef, self.features(record)))
+        if z >= 0:
+            positive = 1.0 / (1.0 + math.exp(-z))
+        else:
+            positive = math.exp(z) / (1.0 + math.exp(z))
+        return self.classes[1 if z > 0 else 0], [1.0 - positive, positive]
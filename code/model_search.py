@@ -0,0 +1,83 @@
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold
+
+# Candidate families and their hyperparameter grids. Random search samples
+# from the same grids.
+SEARCH_SPACE = [
+    (LogisticRegression(random_state=42, max_iter=1000), {
+        'C': [0.01, 0.1, 1.0, 10.0, 100.0],
+        'solver': ['lbfgs', 'liblinear'],
+        'class_weight': [None, 'balanced'],
+    }),
+    (RandomForestClassifier(random_state=42, n_jobs=1), {
+        'n_estimators': [100, 300],
+        'max_depth': [None, 8, 16],
+        'class_weight': [None, 'balanced'],
+    }),
+    (HistGradientBoostingClassifier(random_state=42), {
+        'learning_rate': [0.05, 0.1],
+        'max_iter': [100, 300],
+        'max_leaf_nodes': [15, 31],
+    }),
+]
+
+def iter_candidates(method='grid', n_iter=20, random_state=42):
+    """Yield (estimator, params) for a grid or random search over SEARCH_SPACE"""
+    for base, grid in SEARCH_SPACE:
+        if method == 'random':
+            params = ParameterSampler(grid, n_iter=min(n_iter, len(ParameterGrid(grid))), random_state=random_state)
+        else:
+            params = ParameterGrid(grid)
+        for p in params:
+            yield base, p
+
+def _fit_fold(index, base, params, X, y, train_idx, test_idx):
+    model = clone(base).set_params(**params).fit(X[train_idx], y[train_idx])
+    y_pred = model.predict(X[test_idx])
+    return index, accuracy_score(y[test_idx], y_pred), f1_score(y[test_idx], y_pred)
+
+def search(X, y, method='grid', n_iter=20, cv=5, n_jobs=-1):
+    """Cross-validate every candidate in parallel and return the leaderboard, best first.
+
+    X is the engineered (and, if configured, scaled) training matrix and
+    the fold splits are drawn once; both are shared by every candidate,
+    and joblib memory-maps X for the worker processes rather than copying
+    it per task. Candidates are ranked by mean F1, then mean accuracy,
+    the metrics evaluate.py approves models on.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=42).split(X, y))
+    candidates = list(iter_candidates(method, n_iter))
+
+    start = time.time()
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(index, base, params, X, y, train_idx, test_idx)
+        for index, (base, params) in enumerate(candidates)
+        for train_idx, test_idx in folds)
+
+    fold_scores = [[] for _ in candidates]
+    for index, accuracy, f1 in results:
+        fold_scores[index].append((accuracy, f1))
+
+    leaderboard = []
+    for (base, params), scores in zip(candidates, fold_scores):
+        accuracy, f1 = np.mean(scores, axis=0)
+        leaderboard.append({'model': type(base).__name__, 'params': params,
+                            'cv_accuracy': float(accuracy), 'cv_f1': float(f1)})
+    leaderboard.sort(key=lambda r: (r['cv_f1'], r['cv_accuracy']), reverse=True)
+
+    print(f"Searched {len(candidates)} candidates x {cv} folds in {time.time() - start:.1f}s")
+    return leaderboard
+
+def build(entry):
+    """Unfitted estimator for a leaderboard entry"""
+    base = next(b for b, _ in SEARCH_SPACE if type(b).__name__ == entry['model'])
+    return clone(base).set_params(**entry['params'])
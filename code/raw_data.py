@@ -0,0 +1,139 @@
+import numpy as np
+
+from features import ASSET_COLS, EDUCATION_MAP, LOAN_STATUS_MAP, RAW_COLS, SELF_EMPLOYED_MAP
+
+# Column layout of the raw loan extract (data.csv)
+RAW_FILE_COLS = ['loan_id', 'no_of_dependents', 'education', 'self_employed', 'income_annum',
+                 'loan_amount', 'loan_term', 'credit_score'] + ASSET_COLS + ['loan_status']
+CATEGORY_CODES = {'education': EDUCATION_MAP, 'self_employed': SELF_EMPLOYED_MAP,
+                  'loan_status': LOAN_STATUS_MAP}
+
+DEFAULT_CHUNK_ROWS = 100_000
+# Every TEST_MODULUS-th loan_id (20%) is held out for evaluation
+TEST_MODULUS = 5
+READ_BUFFER_BYTES = 1 << 20
+
+class ParseStats:
+    """Counters for one pass over a raw file"""
+
+    def __init__(self):
+        self.rows = 0
+        self.malformed = 0
+        self.blank = 0
+        self.first_malformed = []
+
+    def record_malformed(self, line_no, max_examples=10):
+        self.malformed += 1
+        if len(self.first_malformed) < max_examples:
+            self.first_malformed.append(line_no)
+
+    def summary(self):
+        text = f"{self.rows} records parsed, {self.malformed} malformed rows"
+        if self.first_malformed:
+            text += f" (first at lines {self.first_malformed})"
+        return text
+
+class RawChunk:
+    """Typed column arrays for up to chunk_rows parsed records.
+
+    Numeric fields are int64, education/self_employed/loan_status are
+    int8 category codes (see CATEGORY_CODES).
+    """
+
+    def __init__(self, capacity):
+        self.size = 0
+        self.columns = {
+            col: np.empty(capacity, dtype=np.int8 if col in CATEGORY_CODES else np.int64)
+            for col in RAW_FILE_COLS
+        }
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, col):
+        return self.columns[col][:self.size]
+
+    def raw_matrix(self):
+        """Float64 matrix in RAW_COLS order, ready for FeatureTransform"""
+        raw = np.empty((self.size, len(RAW_COLS)), dtype=np.float64)
+        for i, col in enumerate(RAW_COLS):
+            raw[:, i] = self[col]
+        return raw
+
+    def labels(self):
+        return self['loan_status']
+
+    def to_frame(self):
+        """DataFrame with category codes decoded back to their labels"""
+        import pandas as pd
+
+        df = pd.DataFrame({col: self[col] for col in RAW_FILE_COLS})
+        for col, mapping in CATEGORY_CODES.items():
+            labels = np.empty(len(mapping), dtype=object)
+            for label, code in mapping.items():
+                labels[code] = label
+            df[col] = labels[df[col].to_numpy()]
+        return df
+
+def holdout_mask(loan_ids):
+    """True for rows held out as the test set; stable per loan_id across runs and chunkings"""
+    return np.asarray(loan_ids) % TEST_MODULUS == 0
+
+def _parse_line(line, chunk, row):
+    """Parse one line into row `row` of chunk; False if the line is malformed"""
+    parts = line.split(',')
+    if len(parts) != len(RAW_FILE_COLS):
+        return False
+    columns = chunk.columns
+    try:
+        for col, value in zip(RAW_FILE_COLS, parts):
+            if col in CATEGORY_CODES:
+                columns[col][row] = CATEGORY_CODES[col][value.strip()]
+            else:
+                columns[col][row] = int(value)
+    except (ValueError, KeyError):
+        return False
+    return True
+
+def iter_raw_chunks(raw_file, chunk_rows=DEFAULT_CHUNK_ROWS, stats=None):
+    """Stream a raw loan CSV as RawChunks of at most chunk_rows records.
+
+    The file is read through a fixed-size buffer and parsed straight into
+    preallocated typed columns, so memory is bounded by chunk_rows rather
+    than by the file size. A leading header line is skipped; rows with the
+    wrong field count, non-integer numbers or unknown categories are
+    counted in stats.malformed instead of being parsed.
+    """
+    stats = stats if stats is not None else ParseStats()
+    chunk = RawChunk(chunk_rows)
+
+    with open(raw_file, 'r', buffering=READ_BUFFER_BYTES) as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                stats.blank += 1
+                continue
+            if line_no == 1 and line.split(',', 1)[0].strip() == RAW_FILE_COLS[0]:
+                continue
+
+            if not _parse_line(line, chunk, chunk.size):
+                stats.record_malformed(line_no)
+                continue
+
+            chunk.size += 1
+            stats.rows += 1
+            if chunk.size == chunk_rows:
+                yield chunk
+                chunk = RawChunk(chunk_rows)
+
+    if chunk.size:
+        yield chunk
+
+def read_raw_data(raw_file, chunk_rows=DEFAULT_CHUNK_ROWS, stats=None):
+    """Parse a whole raw file into (raw matrix, loan_status codes)"""
+    raws, labels = [], []
+    for chunk in iter_raw_chunks(raw_file, chunk_rows, stats):
+        raws.append(chunk.raw_matrix())
+        labels.append(chunk.labels().copy())
+    if not raws:
+        return np.empty((0, len(RAW_COLS))), np.empty(0, dtype=np.int8)
+    return np.concatenate(raws), np.concatenate(labels)
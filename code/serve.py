@@ -0,0 +1,159 @@
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from inference import input_fn, model_fn, output_fn, predict_fn
+
+# Standalone multi-core server for the SageMaker inference handlers. The
+# model is loaded once in the parent; forked workers share it copy-on-write
+# and accept from the same listening socket.
+
+MODEL = None
+
+class InvocationHandler(BaseHTTPRequestHandler):
+    """SageMaker container contract: GET /ping and POST /invocations"""
+
+    protocol_version = 'HTTP/1.1'
+    # Each open connection holds a pool thread; idle keep-alive connections
+    # are closed after this many seconds so they cannot starve the pool
+    timeout = float(os.environ.get('SERVE_KEEPALIVE_SECONDS', '5'))
+    # Headers and body go out in separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40ms) on every keep-alive request
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == '/ping':
+            self.send_body(200, b'', 'text/plain')
+        else:
+            self.send_body(404, b'{"error": "Not found"}')
+
+    def do_POST(self):
+        if self.path not in ('/invocations', '/'):
+            self.send_body(404, b'{"error": "Not found"}')
+            return
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        content_type = self.headers.get('Content-Type', 'application/json').split(';')[0].strip()
+        accept = self.headers.get('Accept', '*/*').split(',')[0].split(';')[0].strip()
+        if accept in ('*/*', ''):
+            accept = content_type
+        try:
+            prediction = predict_fn(input_fn(body, content_type), MODEL)
+            self.send_body(200, output_fn(prediction, accept).encode('utf-8'), accept)
+        except ValueError as e:
+            self.send_body(400, json.dumps({'error': str(e)}).encode('utf-8'))
+        except Exception as e:
+            self.send_body(500, json.dumps({'error': str(e)}).encode('utf-8'))
+
+    def send_body(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles connections on a fixed-size thread pool"""
+
+    def __init__(self, sock, threads):
+        super().__init__(sock.getsockname()[:2], InvocationHandler, bind_and_activate=False)
+        self.socket = sock
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='invocations')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+def run_worker(sock, threads):
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = PooledHTTPServer(sock, threads)
+    server.serve_forever()
+
+def spawn_worker(sock, threads):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(sock, threads)
+        finally:
+            os._exit(0)
+    return pid
+
+def serve(model_dir, host='0.0.0.0', port=8080, workers=None, threads=4):
+    """Load the model once, then fork workers that share it and the listening socket"""
+    global MODEL
+    MODEL = model_fn(model_dir)
+    workers = workers or os.cpu_count() or 1
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+
+    # Move everything loaded so far out of the GC's reach so the collector
+    # does not touch (and copy) the shared model pages in every worker
+    gc.freeze()
+
+    pids = {spawn_worker(sock, threads) for _ in range(workers)}
+    print(f"🚀 Serving {model_dir} on {host}:{port} with {workers} workers x {threads} threads")
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Supervise: replace workers that die until asked to stop
+    while pids:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        pids.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited with status {status}, restarting")
+            time.sleep(0.1)
+            pids.add(spawn_worker(sock, threads))
+
+    sock.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-worker local inference server')
+    parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR', '/opt/ml/model'))
+    parser.add_argument('--host', type=str, default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SERVE_WORKERS', '0')) or None)
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('SERVE_THREADS', '4')))
+    parser.add_argument('--keepalive-seconds', type=float, default=InvocationHandler.timeout,
+                        help='close connections idle for this long')
+    args = parser.parse_args()
+
+    InvocationHandler.timeout = args.keepalive_seconds
+    serve(args.model_dir, args.host, args.port, args.workers, args.threads)
@@ -0,0 +1,124 @@
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+# Per-request stage timings written as CloudWatch embedded metric format
+# (EMF) JSON lines: in Lambda, every line printed to stdout becomes metrics
+# in METRICS_NAMESPACE without any API calls; elsewhere the lines are plain
+# structured logs (or go to whatever sink the recorder is given). Only a
+# METRICS_SAMPLE_RATE fraction of requests is timed; the rest get a no-op
+# timer, so an unsampled request costs one random() call.
+
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'LoanScoring')
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '0.1'))
+
+class StdoutSink:
+    """One JSON document per line on stdout"""
+
+    def write(self, record):
+        sys.stdout.write(json.dumps(record) + '\n')
+
+class MemorySink:
+    """Keeps records in a list; for benchmarks and local runs"""
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+class RequestTimer:
+    """Lap timer for one sampled request: lap(name) records the time since the previous mark"""
+
+    def __init__(self, recorder, request_id, model_version):
+        self.recorder = recorder
+        self.request_id = request_id or uuid.uuid4().hex
+        self.model_version = model_version
+        self.properties = {}
+        self.timings = {}
+        self.started = self.marked = time.perf_counter_ns()
+
+    def mark(self):
+        """Start the next lap here without recording the time since the previous mark"""
+        self.marked = time.perf_counter_ns()
+
+    def lap(self, stage):
+        now = time.perf_counter_ns()
+        self.record(stage, (now - self.marked) / 1e6)
+        self.marked = now
+
+    def record(self, stage, ms):
+        """Record a stage timed elsewhere"""
+        self.timings[stage] = self.timings.get(stage, 0.0) + ms
+
+    def set(self, name, value):
+        """Attach a non-metric property (status code, cache result, ...) to the record"""
+        self.properties[name] = value
+
+    def emit(self, **properties):
+        self.properties.update(properties)
+        self.recorder.emit(self)
+
+class NullTimer:
+    """Stand-in for unsampled requests; every call is a no-op"""
+
+    request_id = None
+    model_version = None
+
+    def mark(self):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def record(self, stage, ms):
+        pass
+
+    def set(self, name, value):
+        pass
+
+    def emit(self, **properties):
+        pass
+
+NULL_TIMER = NullTimer()
+
+class MetricsRecorder:
+    """Starts request timers and writes the sampled ones as EMF records to a sink"""
+
+    def __init__(self, service, namespace=METRICS_NAMESPACE, sample_rate=METRICS_SAMPLE_RATE, sink=None):
+        self.service = service
+        self.namespace = namespace
+        self.sample_rate = sample_rate
+        self.sink = sink or StdoutSink()
+
+    def start(self, request_id=None, model_version=None, always=False):
+        """Timer for a new request, to be passed along with the request's data.
+
+        always=True times the request regardless of the sample rate (e.g. cold starts).
+        """
+        if not always and (self.sample_rate <= 0 or
+                           (self.sample_rate < 1 and random.random() >= self.sample_rate)):
+            return NULL_TIMER
+        return RequestTimer(self, request_id, model_version)
+
+    def emit(self, timer):
+        timings = dict(timer.timings, total=(time.perf_counter_ns() - timer.started) / 1e6)
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [['Service']],
+                    'Metrics': [{'Name': name, 'Unit': 'Milliseconds'} for name in timings],
+                }],
+            },
+            'Service': self.service,
+            'RequestId': timer.request_id,
+            'ModelVersion': timer.model_version,
+        }
+        record.update(timer.properties)
+        record.update({name: round(ms, 4) for name, ms in timings.items()})
+        self.sink.write(record)
@@ -1,110 +1,211 @@
-import pandas as pd
 import joblib
+import json
 import os
 import argparse
-from sklearn.linear_model import LogisticRegression
+import numpy as np
+import sklearn
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, f1_score
-import numpy as np
 
-def format_raw_data(raw_file):
-    """Format messy CSV data into clean structure"""
-    formatted_data = []
-    
-    with open(raw_file, 'r') as f:
-        lines = f.readlines()
-    
-    for line in lines:
-        parts = [part.strip() for part in line.strip().split(',')]
-        
-        if len(parts) < 12:
-            continue
-            
-        try:
-            formatted_data.append({
-                'loan_id': int(parts[0]),
-                'no_of_dependents': int(parts[1]),
-                'education': parts[2].strip(),
-                'self_employed': parts[3].strip(),
-                'income_annum': int(parts[4]),
-                'loan_amount': int(parts[5]),
-                'loan_term': int(parts[6]),
-                'credit_score': int(parts[7]),
-                'residential_assets_value': int(parts[8]),
-                'commercial_assets_value': int(parts[9]),
-                'luxury_assets_value': int(parts[10]),
-                'bank_asset_value': int(parts[11]),
-                'loan_status': parts[12].strip()
-            })
-        except (ValueError, IndexError):
-            continue
-    
-    return pd.DataFrame(formatted_data)
+import model_search
+from dataset import has_dataset, read_dataset
+from evaluate import evaluation_report
+from features import ASSET_COLS, CATEGORY_MAPS, FEATURE_COLS, FeatureTransform
+from linear_scorer import MODEL_FORMAT, MODEL_FORMAT_VERSION, MODEL_JSON, is_logistic
+from raw_data import DEFAULT_CHUNK_ROWS, TEST_MODULUS, ParseStats, holdout_mask, iter_raw_chunks, read_raw_data
 
-def train():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR'))
-    
-    args = parser.parse_args()
-    
-    # Read training data
-    input_path = '/opt/ml/input/data/training'
+# SGDClassifier's logistic loss is 'log' before scikit-learn 1.1 (the
+# training image pins 1.0) and 'log_loss' from 1.1 on
+SGD_LOG_LOSS = 'log_loss' if tuple(int(p) for p in sklearn.__version__.split('.')[:2]) >= (1, 1) else 'log'
+
+
+def find_training_source(input_path):
+    """The preprocessed dataset directory if present, else the raw CSV in the channel"""
+    if has_dataset(input_path):
+        return input_path
     files = os.listdir(input_path)
     data_file = [f for f in files if f.endswith('.csv')][0]
-    
-    # Try to format raw data if needed
-    file_path = os.path.join(input_path, data_file)
-    try:
-        df = pd.read_csv(file_path)
-        # Check if data needs formatting
-        if 'loan_id' not in df.columns:
-            df = format_raw_data(file_path)
-    except:
-        df = format_raw_data(file_path)
-    
-    print(f"Training with {len(df)} records")
-    
-    # Feature engineering
-    df['education'] = df['education'].map({'Graduate': 0, 'Not Graduate': 1})
-    df['self_employed'] = df['self_employed'].map({'No': 0, 'Yes': 1})
-    df['loan_status'] = df['loan_status'].map({'Approved': 1, 'Rejected': 0})
-    
-    # Calculate total assets
-    df['total_assets'] = (df['residential_assets_value'] + 
-                         df['commercial_assets_value'] + 
-                         df['luxury_assets_value'] + 
-                         df['bank_asset_value'])
-    
-    # Log transform numerical features
-    numerical_cols = ['income_annum', 'loan_amount', 'total_assets']
-    for col in numerical_cols:
-        df[col] = np.log(np.abs(df[col]) + 1)
-    
-    # Select features
-    feature_cols = ['no_of_dependents', 'education', 'self_employed', 'income_annum', 
-                   'loan_amount', 'loan_term', 'credit_score', 'total_assets']
-    
-    X = df[feature_cols]
-    y = df['loan_status']
-    
-    # Train-test split
+    return os.path.join(input_path, data_file)
+
+def load_training_set(source):
+    """Engineered feature matrix and labels of the whole training set"""
+    if has_dataset(source):
+        X, y = read_dataset(source)
+        print(f"Training with {len(y)} preprocessed records")
+    else:
+        stats = ParseStats()
+        raw, y = read_raw_data(source, stats=stats)
+        X = FeatureTransform().engineer(raw)
+        print(f"Training with {stats.summary()}")
+    return X, y
+
+def split_and_scale(X, y, standardize=False):
+    """Hold out 20% for evaluation and fit the feature transform on the rest"""
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
+    transform = FeatureTransform(standardize=standardize).fit_features(X_train)
+    return transform, transform.scale(X_train), transform.scale(X_test), y_train, y_test
+
+def score_holdout(model, X_test, y_test):
+    y_pred = model.predict(X_test)
+    return accuracy_score(y_test, y_pred), f1_score(y_test, y_pred)
+
+def train_in_memory(source):
+    """Fit LogisticRegression on the whole training set"""
+    X, y = load_training_set(source)
+    transform, X_train, X_test, y_train, y_test = split_and_scale(X, y)
+
     # Train model
     model = LogisticRegression(random_state=42, max_iter=1000)
     model.fit(X_train, y_train)
-    
+
     # Evaluate
-    y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    f1 = f1_score(y_test, y_pred)
-    
+    accuracy, f1 = score_holdout(model, X_test, y_test)
+
+    return model, transform, accuracy, f1
+
+def train_search(source, method, n_iter, cv, n_jobs):
+    """Cross-validated model search; the winner is refit on the training split.
+
+    The feature matrix is loaded, engineered and standardized once and the
+    hold-out split is the same one train_in_memory uses, so the reported
+    accuracy and F1 are comparable with a plain batch run.
+    """
+    X, y = load_training_set(source)
+    transform, X_train, X_test, y_train, y_test = split_and_scale(X, y, standardize=True)
+
+    leaderboard = model_search.search(X_train, y_train, method, n_iter, cv, n_jobs)
+    for rank, entry in enumerate(leaderboard[:5], 1):
+        print(f"{rank}. {entry['model']} {entry['params']} "
+              f"cv_f1={entry['cv_f1']:.4f} cv_accuracy={entry['cv_accuracy']:.4f}")
+
+    model = model_search.build(leaderboard[0]).fit(X_train, y_train)
+    accuracy, f1 = score_holdout(model, X_test, y_test)
+
+    return model, transform, accuracy, f1
+
+def iter_split_chunks(source, chunk_rows, stats=None):
+    """Yield (X_train, y_train, X_test, y_test) engineered feature chunks.
+
+    Preprocessed datasets are sliced from the memory map and hold out rows
+    by position; raw CSVs are streamed and hold out rows by loan_id.
+    """
+    if has_dataset(source):
+        X, y = read_dataset(source)
+        for start in range(0, len(y), chunk_rows):
+            features = np.asarray(X[start:start + chunk_rows], dtype=np.float64)
+            labels = np.asarray(y[start:start + chunk_rows])
+            is_test = np.arange(start, start + len(labels)) % TEST_MODULUS == 0
+            yield features[~is_test], labels[~is_test], features[is_test], labels[is_test]
+        return
+
+    engineer = FeatureTransform().engineer
+    for chunk in iter_raw_chunks(source, chunk_rows, stats):
+        features, labels = engineer(chunk.raw_matrix()), chunk.labels()
+        is_test = holdout_mask(chunk['loan_id'])
+        yield features[~is_test], labels[~is_test], features[is_test], labels[is_test]
+
+def train_incremental(source, chunk_rows, epochs):
+    """Stream the training set in chunks and fit an SGD logistic model with partial_fit.
+
+    Pass 1 folds every chunk into the running feature statistics, then each
+    epoch re-streams the data and calls partial_fit on the standardized
+    chunk. A final pass scores the held-out rows, so memory stays bounded by
+    chunk_rows however large the file is.
+    """
+    stats = ParseStats()
+    transform = FeatureTransform(standardize=True)
+    for X_train, _, _, _ in iter_split_chunks(source, chunk_rows, stats):
+        transform.partial_fit_features(X_train)
+
+    print(f"Training incrementally with {transform.n_samples} training records")
+    if stats.malformed:
+        print(f"⚠️ {stats.summary()}")
+
+    model = SGDClassifier(loss=SGD_LOG_LOSS, random_state=42)
+    classes = np.array([0, 1])
+    rng = np.random.default_rng(42)
+    for epoch in range(epochs):
+        for X_train, y_train, _, _ in iter_split_chunks(source, chunk_rows):
+            if len(y_train) == 0:
+                continue
+            order = rng.permutation(len(y_train))
+            model.partial_fit(transform.scale(X_train[order]), y_train[order], classes=classes)
+        print(f"Epoch {epoch + 1}/{epochs} done")
+
+    # Evaluate on the held-out rows with running confusion counts
+    correct = total = tp = fp = fn = 0
+    for _, _, X_test, y_test in iter_split_chunks(source, chunk_rows):
+        if len(y_test) == 0:
+            continue
+        y_pred = model.predict(transform.scale(X_test))
+        correct += int((y_pred == y_test).sum())
+        total += len(y_test)
+        tp += int(((y_pred == 1) & (y_test == 1)).sum())
+        fp += int(((y_pred == 1) & (y_test == 0)).sum())
+        fn += int(((y_pred == 0) & (y_test == 1)).sum())
+
+    accuracy = correct / total if total else 0.0
+    f1 = 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+
+    return model, transform, accuracy, f1
+
+def export_linear_model(model, transform, model_dir):
+    """Write model.json, the dependency-free form of a logistic model, next to model.pkl"""
+    if not is_logistic(model) or len(model.classes_) != 2:
+        print("Model is not binary logistic, skipping model.json export")
+        return False
+
+    spec = {
+        'format': MODEL_FORMAT,
+        'format_version': MODEL_FORMAT_VERSION,
+        'feature_cols': FEATURE_COLS,
+        'asset_cols': ASSET_COLS,
+        'category_maps': CATEGORY_MAPS,
+        'transform': transform.to_dict(),
+        'coef': model.coef_[0].tolist(),
+        'intercept': float(model.intercept_[0]),
+        'classes': model.classes_.tolist(),
+    }
+    with open(os.path.join(model_dir, MODEL_JSON), 'w') as f:
+        json.dump(spec, f)
+    return True
+
+def train():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR'))
+    parser.add_argument('--mode', type=str, default='batch', choices=['batch', 'incremental'])
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--search', type=str, default='none', choices=['none', 'grid', 'random'])
+    parser.add_argument('--search-iter', type=int, default=20)
+    parser.add_argument('--cv-folds', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+
+    args = parser.parse_args()
+
+    # Read training data: a preprocessed dataset or the raw CSV
+    source = find_training_source('/opt/ml/input/data/training')
+
+    if args.mode == 'incremental':
+        model, transform, accuracy, f1 = train_incremental(source, args.chunk_rows, args.epochs)
+    elif args.search != 'none':
+        model, transform, accuracy, f1 = train_search(source, args.search, args.search_iter,
+                                                      args.cv_folds, args.n_jobs)
+    else:
+        model, transform, accuracy, f1 = train_in_memory(source)
+
     print(f"Accuracy: {accuracy:.4f}")
     print(f"F1 Score: {f1:.4f}")
-    
+
     # Save model
     joblib.dump(model, os.path.join(args.model_dir, 'model.pkl'))
+    transform.save(args.model_dir)
+    export_linear_model(model, transform, args.model_dir)
+    # Hold-out metrics travel with the model for the model registry
+    with open(os.path.join(args.model_dir, 'evaluation.json'), 'w') as f:
+        json.dump(evaluation_report(accuracy, f1), f, indent=2)
     print("Model saved successfully")
 
 if __name__ == '__main__':
-    train()
\ No newline at end of file
+    train()
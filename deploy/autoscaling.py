@@ -0,0 +1,45 @@
+# Target-tracking autoscaling of an endpoint variant's instance count on
+# SageMakerVariantInvocationsPerInstance (invocations per instance per minute).
+
+SCALABLE_DIMENSION = 'sagemaker:variant:DesiredInstanceCount'
+
+def resource_id(endpoint_name, variant_name):
+    return f'endpoint/{endpoint_name}/variant/{variant_name}'
+
+def enable_autoscaling(autoscaling, endpoint_name, variant_name, min_instances, max_instances,
+                       target_invocations, scale_in_cooldown=300, scale_out_cooldown=60):
+    """Register the variant as a scalable target and attach the target-tracking policy"""
+    resource = resource_id(endpoint_name, variant_name)
+    autoscaling.register_scalable_target(
+        ServiceNamespace='sagemaker',
+        ResourceId=resource,
+        ScalableDimension=SCALABLE_DIMENSION,
+        MinCapacity=min_instances,
+        MaxCapacity=max_instances,
+    )
+    autoscaling.put_scaling_policy(
+        PolicyName=f'{variant_name}-invocations',
+        ServiceNamespace='sagemaker',
+        ResourceId=resource,
+        ScalableDimension=SCALABLE_DIMENSION,
+        PolicyType='TargetTrackingScaling',
+        TargetTrackingScalingPolicyConfiguration={
+            'TargetValue': float(target_invocations),
+            'PredefinedMetricSpecification': {'PredefinedMetricType': 'SageMakerVariantInvocationsPerInstance'},
+            'ScaleInCooldown': scale_in_cooldown,
+            'ScaleOutCooldown': scale_out_cooldown,
+        },
+    )
+    print(f"📈 Autoscaling {variant_name}: {min_instances}-{max_instances} instances, "
+          f"target {target_invocations:g} invocations/instance/minute")
+
+def disable_autoscaling(autoscaling, endpoint_name, variant_name):
+    """Deregister the variant's scalable target (and its policies); no-op if it has none"""
+    try:
+        autoscaling.deregister_scalable_target(
+            ServiceNamespace='sagemaker',
+            ResourceId=resource_id(endpoint_name, variant_name),
+            ScalableDimension=SCALABLE_DIMENSION,
+        )
+    except autoscaling.exceptions.ObjectNotFoundException:
+        pass
@@ -0,0 +1,144 @@
+import argparse
+import json
+import math
+
+# Sizes loan-endpoint from a benchmark profile of the scorer. The profile
+# (written by benchmarks/run_benchmarks.py) gives the single-core request
+# throughput and the latency of each batch size; the planner turns that
+# into instances per type for a target request rate and p99 latency, and
+# into the autoscaling settings deploy_model.py reads from the environment.
+
+PROFILE_FORMAT = 'loan-scorer-benchmark'
+
+# vCPUs and approximate on-demand real-time inference price (USD/hour,
+# us-east-1); check current pricing before committing to a size
+INSTANCE_TYPES = {
+    'ml.c5.large': (2, 0.102),
+    'ml.c5.xlarge': (4, 0.204),
+    'ml.c5.2xlarge': (8, 0.408),
+    'ml.c5.4xlarge': (16, 0.816),
+    'ml.m5.large': (2, 0.115),
+    'ml.m5.xlarge': (4, 0.230),
+    'ml.m5.2xlarge': (8, 0.461),
+    'ml.m5.4xlarge': (16, 0.922),
+}
+
+# p99 of an exponential response time is ln(100) times its mean
+P99_FACTOR = math.log(100)
+# Upper bound for the autoscaling target (invocations per instance per
+# minute), whatever the profile says; a microbenchmark of the scorer alone
+# can suggest rates no real container reaches
+MAX_TARGET_INVOCATIONS_PER_INSTANCE = 6000
+
+def load_profile(path):
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get('format') != PROFILE_FORMAT:
+        raise ValueError(f"{path} is not a {PROFILE_FORMAT} profile")
+    return profile
+
+def core_capacity(profile, target_p99_ms, micro_batch_wait_ms=0.0):
+    """Requests/second one core sustains, and the p99 it sees unloaded, within target_p99_ms.
+
+    Without micro-batching every request is scored alone at the profile's
+    single-core throughput. With it, the largest batch size whose wait plus
+    p99 batch latency still fits the target sets the throughput. Either
+    way every request also pays the profile's request_overhead_ms of core
+    time (HTTP parsing, serialization) outside the scorer.
+    """
+    overhead = profile.get('request_overhead_ms') or 0.0
+    batches = {int(size): stats for size, stats in profile['batch_latency_ms'].items()}
+
+    rps = 1000.0 / (1000.0 / profile['throughput_per_core_rps'] + overhead)
+    p99 = batches[1]['p99'] + overhead
+    if micro_batch_wait_ms > 0:
+        for size in sorted(batches):
+            batch_p99 = micro_batch_wait_ms + batches[size]['p99'] + overhead
+            batch_rps = 1000.0 / (batches[size]['p50'] / size + overhead)
+            if batch_p99 <= target_p99_ms and batch_rps > rps:
+                rps, p99 = batch_rps, batch_p99
+    return rps, p99
+
+def max_utilization(rps, p99, target_p99_ms, ceiling):
+    """Highest per-core utilization whose queueing still keeps p99 under the target.
+
+    Each core is treated as an M/M/1 queue: p99 response time is about
+    ln(100) * service_time / (1 - utilization) on top of the fixed overhead.
+    """
+    if p99 > target_p99_ms:
+        return 0.0
+    service_ms = 1000.0 / rps
+    budget = target_p99_ms - (p99 - service_ms)
+    return max(0.0, min(ceiling, 1.0 - P99_FACTOR * service_ms / budget))
+
+def plan(profile, target_qps, target_p99_ms, instance_types=None, utilization_ceiling=0.75,
+         min_instances=1, burst_factor=2.0, micro_batch_wait_ms=0.0,
+         max_target_invocations=MAX_TARGET_INVOCATIONS_PER_INSTANCE):
+    """Options per instance type, cheapest feasible first"""
+    rps, p99 = core_capacity(profile, target_p99_ms, micro_batch_wait_ms)
+    utilization = max_utilization(rps, p99, target_p99_ms, utilization_ceiling)
+
+    options = []
+    for name in instance_types or INSTANCE_TYPES:
+        vcpus, price = INSTANCE_TYPES[name]
+        # Sized at the clamped rate too, so the count matches the autoscaling target
+        usable_rps = min(rps * vcpus * utilization, max_target_invocations / 60.0)
+        option = {'instance_type': name, 'vcpus': vcpus, 'feasible': usable_rps > 0}
+        if option['feasible']:
+            count = max(min_instances, math.ceil(target_qps / usable_rps))
+            option.update({
+                'instance_count': count,
+                'usable_rps_per_instance': round(usable_rps, 1),
+                'hourly_cost': round(count * price, 3),
+                # deploy_model.py environment for this size
+                'autoscaling': {
+                    'ENDPOINT_INSTANCE_TYPE': name,
+                    'ENDPOINT_MIN_INSTANCES': count,
+                    'ENDPOINT_MAX_INSTANCES': max(count, math.ceil(count * burst_factor)),
+                    'ENDPOINT_TARGET_INVOCATIONS_PER_INSTANCE': int(usable_rps * 60),
+                },
+            })
+        options.append(option)
+
+    options.sort(key=lambda o: (not o['feasible'], o.get('hourly_cost', 0), o.get('instance_count', 0)))
+    return {'core_rps': round(rps, 1), 'unloaded_p99_ms': round(p99, 2),
+            'max_utilization': round(utilization, 3), 'options': options}
+
+def main():
+    parser = argparse.ArgumentParser(description='Recommend endpoint instance type and count from a benchmark profile')
+    parser.add_argument('profile', type=str)
+    parser.add_argument('--target-qps', type=float, required=True)
+    parser.add_argument('--target-p99-ms', type=float, required=True)
+    parser.add_argument('--instance-types', type=str, nargs='*', choices=sorted(INSTANCE_TYPES))
+    parser.add_argument('--utilization-ceiling', type=float, default=0.75)
+    parser.add_argument('--min-instances', type=int, default=1)
+    parser.add_argument('--burst-factor', type=float, default=2.0)
+    parser.add_argument('--micro-batch-wait-ms', type=float, default=0.0)
+    parser.add_argument('--max-target-invocations', type=int, default=MAX_TARGET_INVOCATIONS_PER_INSTANCE,
+                        help='cap on ENDPOINT_TARGET_INVOCATIONS_PER_INSTANCE (per instance per minute)')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    result = plan(load_profile(args.profile), args.target_qps, args.target_p99_ms, args.instance_types,
+                  args.utilization_ceiling, args.min_instances, args.burst_factor, args.micro_batch_wait_ms,
+                  args.max_target_invocations)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"Per core: {result['core_rps']} req/s, unloaded p99 {result['unloaded_p99_ms']} ms, "
+          f"run at <= {result['max_utilization']:.0%} utilization")
+    feasible = [o for o in result['options'] if o['feasible']]
+    if not feasible:
+        print(f"❌ No instance type meets p99 <= {args.target_p99_ms} ms; the scorer alone is too slow")
+        return
+    for option in feasible:
+        print(f"  {option['instance_type']:<14} x{option['instance_count']:<3} "
+              f"${option['hourly_cost']:.3f}/h  ({option['usable_rps_per_instance']} req/s each)")
+    best = feasible[0]
+    print(f"✅ Recommended: {best['instance_count']} x {best['instance_type']}")
+    for name, value in best['autoscaling'].items():
+        print(f"   {name}={value}")
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,16 @@
 import boto3
+import io
+import json
+import tarfile
 import time
 
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Pipeline'))
+from model_registry import open_registry
+from autoscaling import disable_autoscaling, enable_autoscaling
+from traffic_shift import DEFAULT_BAKE_SECONDS, DEFAULT_STEPS, SageMakerEndpoint, TrafficShiftController
 
 # ================== CONFIG ==================
 REGION = os.environ.get('AWS_DEFAULT_REGION', 'eu-central-1')
@@ -9,25 +18,69 @@ ROLE_ARN = "arn:aws:iam::361509912577:role/SageMakerExecutionRole"
 BUCKET = os.environ.get('S3_BUCKET', 'teamars-1ee00834-addb14e0')  # Use environment variable
 MODEL_PACKAGE_GROUP_NAME = "loan-model-package-group"
 ENDPOINT_NAME = "loan-endpoint"
-INSTANCE_TYPE = "ml.m5.large"
+INSTANCE_TYPE = os.environ.get('ENDPOINT_INSTANCE_TYPE', "ml.m5.large")
+SERVING_MODEL_KEY = "serving/model.json"  # Read by the Lambda's local scoring mode
+MODEL_REGISTRY_URI = os.environ.get('MODEL_REGISTRY_URI') or f"s3://{BUCKET}/registry/models.json"
+# shift: canary then linear traffic shift with automatic rollback; all-at-once: swap the config
+DEPLOY_STRATEGY = os.environ.get('DEPLOY_STRATEGY', 'shift')
+SHIFT_STEPS = [int(p) for p in os.environ.get('SHIFT_STEPS', ','.join(map(str, DEFAULT_STEPS))).split(',')]
+SHIFT_BAKE_SECONDS = int(os.environ.get('SHIFT_BAKE_SECONDS', DEFAULT_BAKE_SECONDS))
+# Redeploy even when the endpoint already serves the resolved artifact (e.g. to apply new container settings)
+FORCE_DEPLOY = os.environ.get('DEPLOY_FORCE', 'off') == 'on'
+# Target-tracking autoscaling on invocations per instance per minute (see capacity_planner.py)
+AUTOSCALING_ENABLED = os.environ.get('ENDPOINT_AUTOSCALING', 'on') != 'off'
+MIN_INSTANCES = int(os.environ.get('ENDPOINT_MIN_INSTANCES', '1'))
+MAX_INSTANCES = int(os.environ.get('ENDPOINT_MAX_INSTANCES', '4'))
+TARGET_INVOCATIONS_PER_INSTANCE = float(os.environ.get('ENDPOINT_TARGET_INVOCATIONS_PER_INSTANCE', '600'))
+SCALE_IN_COOLDOWN = int(os.environ.get('ENDPOINT_SCALE_IN_COOLDOWN', '300'))
+SCALE_OUT_COOLDOWN = int(os.environ.get('ENDPOINT_SCALE_OUT_COOLDOWN', '60'))
+# Request coalescing in the serving container (code/inference.py); 0 scores every request alone
+MICRO_BATCH_WAIT_MS = os.environ.get('ENDPOINT_MICRO_BATCH_WAIT_MS', '2')
+MICRO_BATCH_MAX_ROWS = os.environ.get('ENDPOINT_MICRO_BATCH_MAX_ROWS', '64')
 # ============================================
 
 def get_latest_model():
-    """Get the latest trained model from S3"""
+    """Get the latest approved model from the model registry.
+
+    Falls back to the newest training output only while the registry is
+    empty; once models are registered, deploying anything but an approved
+    one would bypass a rejection, so the deploy fails instead.
+    """
+    try:
+        registry = open_registry(MODEL_REGISTRY_URI)
+        entry = registry.latest_approved()
+        registered = registry.versions()
+    except Exception as e:
+        sys.exit(f"❌ Could not read model registry {MODEL_REGISTRY_URI}: {e}")
+    
+    if entry:
+        print(f"✅ Found approved model {entry['version']}: {entry['model_data_url']} {entry['metrics']}")
+        return entry['model_data_url']
+    
+    if registered:
+        sys.exit(f"❌ None of the {len(registered)} registered models is approved, not deploying")
+    
+    print("⚠️ Model registry is empty, falling back to the newest training output")
+    return find_newest_training_output()
+
+def find_newest_training_output():
+    """Newest model-output/<job>/ folder, across all listing pages"""
     print(f"🔍 Using bucket: {BUCKET}")
     s3 = boto3.client("s3", region_name=REGION)
     
     try:
-        response = s3.list_objects_v2(
-            Bucket=BUCKET.replace('s3://', '').replace('/', ''),
-            Prefix='model-output/',
-            Delimiter='/'
-        )
+        folders = []
+        paginator = s3.get_paginator('list_objects_v2')
+        bucket = BUCKET.replace('s3://', '').replace('/', '')
+        for page in paginator.paginate(Bucket=bucket, Prefix='model-output/', Delimiter='/'):
+            folders.extend(obj['Prefix'] for obj in page.get('CommonPrefixes', []))
         
-        if 'CommonPrefixes' in response:
-            # Get the latest training job folder
-            folders = [obj['Prefix'] for obj in response['CommonPrefixes']]
-            latest_folder = sorted(folders)[-1]
+        if folders:
+            # Job folders are loan-model-<unix time>; order by the time, not lexically
+            def job_time(folder):
+                suffix = folder.rstrip('/').rsplit('-', 1)[-1]
+                return int(suffix) if suffix.isdigit() else 0
+            latest_folder = max(folders, key=job_time)
             model_data_url = f"s3://{BUCKET}/{latest_folder}output/model.tar.gz"
             print(f"✅ Found trained model: {model_data_url}")
             return model_data_url
@@ -39,6 +92,42 @@ def get_latest_model():
         print(f"❌ Error finding model: {e}")
         return None
 
+def publish_serving_model(model_data_url, model_version):
+    """Copy the artifact's exported model.json to a stable key for Lambda local scoring.
+
+    A model without an export (e.g. a RandomForest) is published as a
+    disabled spec, so the Lambda drops its previous local model and uses
+    the endpoint. Failing to publish fails the deploy: the Lambda would
+    otherwise keep scoring with the previous model.
+    """
+    s3 = boto3.client("s3", region_name=REGION)
+    bucket, _, key = model_data_url.replace('s3://', '', 1).partition('/')
+    
+    try:
+        artifact = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        with tarfile.open(fileobj=io.BytesIO(artifact), mode='r:gz') as tar:
+            members = [m for m in tar.getmembers() if os.path.basename(m.name) == 'model.json']
+            spec = json.load(tar.extractfile(members[0])) if members else None
+        
+        if spec is None:
+            # Never leave an older model behind for the Lambda to score with
+            spec = {'disabled': True}
+            print("⚠️ Model has no model.json export, Lambda local scoring will use the endpoint")
+        
+        spec['model_version'] = model_version
+        spec['model_data_url'] = model_data_url
+        s3.put_object(
+            Bucket=bucket,
+            Key=SERVING_MODEL_KEY,
+            Body=json.dumps(spec).encode('utf-8'),
+            ContentType='application/json'
+        )
+        print(f"✅ Published serving model: s3://{bucket}/{SERVING_MODEL_KEY}")
+        return not spec.get('disabled', False)
+    except Exception as e:
+        sys.exit(f"❌ Could not publish serving model for {model_version}, the Lambda may still score "
+                 f"with the previous model: {e}")
+
 def deploy_to_sagemaker():
     sm = boto3.client("sagemaker", region_name=REGION)
     
@@ -47,6 +136,29 @@ def deploy_to_sagemaker():
     if not model_data_url:
         return
     
+    try:
+        endpoint_info = sm.describe_endpoint(EndpointName=ENDPOINT_NAME)
+    except sm.exceptions.ClientError as e:
+        if 'does not exist' in str(e) or 'Could not find endpoint' in str(e):
+            endpoint_info = None
+        else:
+            print(f"❌ Error: {e}")
+            return
+    
+    if endpoint_info is not None:
+        endpoint_status = endpoint_info['EndpointStatus']
+        if endpoint_status in ('Creating', 'Updating', 'SystemUpdating', 'RollingBack'):
+            # Let the running change finish instead of skipping this deploy
+            print(f"⏳ Endpoint is {endpoint_status}, waiting...")
+            sm.get_waiter('endpoint_in_service').wait(EndpointName=ENDPOINT_NAME)
+            endpoint_info = sm.describe_endpoint(EndpointName=ENDPOINT_NAME)
+            endpoint_status = endpoint_info['EndpointStatus']
+        
+        # Step-cache hits and infra/UI-only builds resolve the same approved artifact again
+        if not FORCE_DEPLOY and serving_model_data_url(sm, endpoint_info) == model_data_url:
+            print(f"♻️ {ENDPOINT_NAME} already serves {model_data_url}, nothing to deploy")
+            return
+    
     model_version = f"loan-model-{int(time.time())}"
     print(f"🚀 Creating SageMaker Model from: {model_data_url}")
     
@@ -58,55 +170,154 @@ def deploy_to_sagemaker():
             "ModelDataUrl": model_data_url,
             "Environment": {
                 "SAGEMAKER_PROGRAM": "inference.py",
-                "SAGEMAKER_SUBMIT_DIRECTORY": f"s3://{BUCKET}/code/source.tar.gz"
+                "SAGEMAKER_SUBMIT_DIRECTORY": f"s3://{BUCKET}/code/source.tar.gz",
+                # Tags the container's stage metrics and responses (code/inference.py)
+                "MODEL_VERSION": model_version,
+                "MICRO_BATCH_WAIT_MS": MICRO_BATCH_WAIT_MS,
+                "MICRO_BATCH_MAX_ROWS": MICRO_BATCH_MAX_ROWS
             }
         },
         ExecutionRoleArn=ROLE_ARN,
     )
     
+    print("🌐 Deploying Endpoint:", ENDPOINT_NAME)
+    
+    if endpoint_info is None:
+        new_variant, config_name = create_endpoint_config(sm, model_version, MIN_INSTANCES)
+        print("🆕 Creating new endpoint...")
+        sm.create_endpoint(
+            EndpointName=ENDPOINT_NAME,
+            EndpointConfigName=config_name,
+        )
+        if AUTOSCALING_ENABLED:
+            sm.get_waiter('endpoint_in_service').wait(EndpointName=ENDPOINT_NAME)
+            apply_autoscaling(new_variant['VariantName'])
+        publish_serving_model(model_data_url, model_version)
+        print("✅ Deployment triggered successfully!")
+        return
+    
+    # Start the new model on as many instances as currently serve, so the switch does not shrink capacity
+    serving = sum(v.get('CurrentInstanceCount') or 0 for v in endpoint_info['ProductionVariants'])
+    new_variant, config_name = create_endpoint_config(sm, model_version,
+                                                      min(max(serving, MIN_INSTANCES), MAX_INSTANCES))
+    
+    # Scaling policies are removed while variants change and put back on the variant that serves
+    autoscaling = boto3.client("application-autoscaling", region_name=REGION)
+    for variant in endpoint_info['ProductionVariants']:
+        disable_autoscaling(autoscaling, ENDPOINT_NAME, variant['VariantName'])
+    
+    if DEPLOY_STRATEGY == 'shift' and endpoint_status == 'InService':
+        if not shift_traffic(sm, endpoint_info, new_variant, config_name):
+            reject_model(model_data_url)
+            for variant in endpoint_info['ProductionVariants']:
+                apply_autoscaling(variant['VariantName'])
+            print("❌ Deployment rolled back, endpoint still serves the previous model")
+            sys.exit(1)
+    else:
+        print("🔁 Updating existing endpoint...")
+        sm.update_endpoint(
+            EndpointName=ENDPOINT_NAME,
+            EndpointConfigName=config_name,
+        )
+        if AUTOSCALING_ENABLED:
+            sm.get_waiter('endpoint_in_service').wait(EndpointName=ENDPOINT_NAME)
+    
+    apply_autoscaling(new_variant['VariantName'])
+    publish_serving_model(model_data_url, model_version)
+    print("✅ Deployment triggered successfully!")
+
+def serving_model_data_url(sm, endpoint_info):
+    """ModelDataUrl of the model behind a single-variant endpoint; None mid-shift or if unknown"""
+    if len(endpoint_info['ProductionVariants']) != 1:
+        return None
+    variant_name = endpoint_info['ProductionVariants'][0]['VariantName']
+    try:
+        config = sm.describe_endpoint_config(EndpointConfigName=endpoint_info['EndpointConfigName'])
+        variant = next(v for v in config['ProductionVariants'] if v['VariantName'] == variant_name)
+        return sm.describe_model(ModelName=variant['ModelName'])['PrimaryContainer'].get('ModelDataUrl')
+    except Exception as e:
+        print(f"⚠️ Could not tell which model {ENDPOINT_NAME} serves: {e}")
+        return None
+
+def create_endpoint_config(sm, model_version, instance_count):
+    """Single-variant endpoint config serving model_version; returns (variant, config name)"""
+    variant = production_variant(model_version, instance_count=instance_count)
     config_name = model_version + "-config"
     print("📄 Creating Endpoint Config:", config_name)
     
     sm.create_endpoint_config(
         EndpointConfigName=config_name,
-        ProductionVariants=[
-            {
-                "VariantName": "AllTraffic",
-                "ModelName": model_version,
-                "InitialInstanceCount": 1,
-                "InstanceType": INSTANCE_TYPE,
-            }
-        ],
+        ProductionVariants=[variant],
     )
+    return variant, config_name
+
+def apply_autoscaling(variant_name):
+    if not AUTOSCALING_ENABLED:
+        return
+    autoscaling = boto3.client("application-autoscaling", region_name=REGION)
+    enable_autoscaling(autoscaling, ENDPOINT_NAME, variant_name, MIN_INSTANCES, MAX_INSTANCES,
+                       TARGET_INVOCATIONS_PER_INSTANCE, SCALE_IN_COOLDOWN, SCALE_OUT_COOLDOWN)
+
+def production_variant(model_name, weight=1.0, instance_count=None):
+    """Endpoint variant for a model; named after it so responses say which model answered"""
+    return {
+        "VariantName": model_name,
+        "ModelName": model_name,
+        "InitialInstanceCount": instance_count or MIN_INSTANCES,
+        "InstanceType": INSTANCE_TYPE,
+        "InitialVariantWeight": weight,
+    }
+
+def shift_traffic(sm, endpoint_info, new_variant, final_config_name):
+    """Canary, then linear shift to the new variant; True once it serves all traffic alone"""
+    old_config_name = endpoint_info['EndpointConfigName']
+    current = max(endpoint_info['ProductionVariants'], key=lambda v: v.get('CurrentWeight', 0))
+    old_name = current['VariantName']
+    old_config = sm.describe_endpoint_config(EndpointConfigName=old_config_name)
+    old_variant = next(v for v in old_config['ProductionVariants'] if v['VariantName'] == old_name)
+    # Keep the fleet the old variant has scaled to while traffic moves
+    old_variant = dict(old_variant, InitialInstanceCount=max(current.get('CurrentInstanceCount') or 1, MIN_INSTANCES))
     
-    print("🌐 Deploying Endpoint:", ENDPOINT_NAME)
+    # Bring the new variant up next to the old one with no traffic; the old
+    # fleet keeps serving while the new instances start
+    shift_config_name = new_variant['ModelName'] + "-shift-config"
+    print(f"🐤 Adding {new_variant['VariantName']} next to {old_name} ({shift_config_name})")
+    sm.create_endpoint_config(
+        EndpointConfigName=shift_config_name,
+        ProductionVariants=[dict(old_variant, InitialVariantWeight=1.0), dict(new_variant, InitialVariantWeight=0.0)],
+    )
+    waiter = sm.get_waiter('endpoint_in_service')
+    sm.update_endpoint(EndpointName=ENDPOINT_NAME, EndpointConfigName=shift_config_name)
+    waiter.wait(EndpointName=ENDPOINT_NAME)
+    
+    endpoint = SageMakerEndpoint(sm, boto3.client("cloudwatch", region_name=REGION), ENDPOINT_NAME)
+    controller = TrafficShiftController(endpoint, old_name, new_variant['VariantName'],
+                                        steps=SHIFT_STEPS, bake_seconds=SHIFT_BAKE_SECONDS)
+    promoted = controller.run()
     
+    # Drop the variant that lost. A rollback keeps the old variant at its
+    # current size rather than the original config's InitialInstanceCount,
+    # so a fleet that scaled out does not shrink as it takes back all traffic
+    if promoted:
+        config_name = final_config_name
+    else:
+        config_name = new_variant['ModelName'] + "-rollback-config"
+        sm.create_endpoint_config(EndpointConfigName=config_name,
+                                  ProductionVariants=[dict(old_variant, InitialVariantWeight=1.0)])
+    sm.update_endpoint(EndpointName=ENDPOINT_NAME, EndpointConfigName=config_name)
+    waiter.wait(EndpointName=ENDPOINT_NAME)
+    return promoted
+
+def reject_model(model_data_url):
+    """Withdraw approval of a model that regressed in production so it is not redeployed"""
     try:
-        endpoint_info = sm.describe_endpoint(EndpointName=ENDPOINT_NAME)
-        endpoint_status = endpoint_info['EndpointStatus']
-        
-        if endpoint_status == 'InService':
-            print("🔁 Updating existing endpoint...")
-            sm.update_endpoint(
-                EndpointName=ENDPOINT_NAME,
-                EndpointConfigName=config_name,
-            )
-        else:
-            print(f"⏳ Endpoint is {endpoint_status}, waiting...")
-            return
-            
+        registry = open_registry(MODEL_REGISTRY_URI)
+        entry = registry.latest_approved()
+        if entry and entry['model_data_url'] == model_data_url:
+            registry.set_approval(entry['version'], False)
+            print(f"📒 Marked {entry['version']} as not approved")
     except Exception as e:
-        if 'does not exist' in str(e) or 'Could not find endpoint' in str(e):
-            print("🆕 Creating new endpoint...")
-            sm.create_endpoint(
-                EndpointName=ENDPOINT_NAME,
-                EndpointConfigName=config_name,
-            )
-        else:
-            print(f"❌ Error: {e}")
-            return
-    
-    print("✅ Deployment triggered successfully!")
+        print(f"⚠️ Could not update model registry: {e}")
 
 if __name__ == "__main__":
     deploy_to_sagemaker()
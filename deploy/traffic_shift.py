@@ -0,0 +1,184 @@
+import argparse
+import time
+
+# Gradual traffic shifting between two production variants of one endpoint.
+# The new variant starts at a small canary weight and moves up in steps;
+# after each step the controller bakes for a while and compares the new
+# variant's error rate and latency with the old one's, rolling all traffic
+# back to the old variant on a regression.
+
+# Percent of traffic on the new variant: canary, linear steps, full
+DEFAULT_STEPS = [10, 25, 50, 75, 100]
+DEFAULT_BAKE_SECONDS = 180
+DEFAULT_CHECK_SECONDS = 60
+
+class Thresholds:
+    """When the new variant counts as a regression against the old one"""
+
+    def __init__(self, max_error_rate=0.01, error_rate_factor=2.0, latency_factor=1.5,
+                 latency_slack_ms=20.0, min_invocations=20):
+        self.max_error_rate = max_error_rate
+        self.error_rate_factor = error_rate_factor
+        self.latency_factor = latency_factor
+        self.latency_slack_ms = latency_slack_ms
+        self.min_invocations = min_invocations
+
+    def regression(self, new, old):
+        """Reason the new variant's metrics regress against the old one's, or None"""
+        if new['invocations'] < self.min_invocations:
+            return None  # Not enough traffic to judge yet
+        allowed_errors = max(self.max_error_rate, old['error_rate'] * self.error_rate_factor)
+        if new['error_rate'] > allowed_errors:
+            return f"error rate {new['error_rate']:.2%} > {allowed_errors:.2%}"
+        if old['latency_ms'] is not None and new['latency_ms'] is not None:
+            allowed_latency = old['latency_ms'] * self.latency_factor + self.latency_slack_ms
+            if new['latency_ms'] > allowed_latency:
+                return f"p99 latency {new['latency_ms']:.0f}ms > {allowed_latency:.0f}ms"
+        return None
+
+class SageMakerEndpoint:
+    """Variant weights via UpdateEndpointWeightsAndCapacities, health from CloudWatch"""
+
+    def __init__(self, sm, cloudwatch, endpoint_name):
+        self.sm = sm
+        self.cloudwatch = cloudwatch
+        self.endpoint_name = endpoint_name
+
+    def set_weights(self, weights):
+        self.sm.update_endpoint_weights_and_capacities(
+            EndpointName=self.endpoint_name,
+            DesiredWeightsAndCapacities=[{'VariantName': name, 'DesiredWeight': float(weight)}
+                                         for name, weight in weights.items()])
+        self.sm.get_waiter('endpoint_in_service').wait(EndpointName=self.endpoint_name)
+
+    def variant_metrics(self, variant, start, end):
+        """Invocations, 5xx error rate and p99 model latency of a variant between start and end"""
+        dimensions = [{'Name': 'EndpointName', 'Value': self.endpoint_name},
+                      {'Name': 'VariantName', 'Value': variant}]
+
+        def query(query_id, metric, stat):
+            return {'Id': query_id, 'MetricStat': {
+                'Metric': {'Namespace': 'AWS/SageMaker', 'MetricName': metric, 'Dimensions': dimensions},
+                'Period': 60, 'Stat': stat}}
+
+        response = self.cloudwatch.get_metric_data(
+            MetricDataQueries=[query('invocations', 'Invocations', 'Sum'),
+                               query('errors', 'Invocation5XXErrors', 'Sum'),
+                               query('latency', 'ModelLatency', 'p99')],
+            StartTime=start, EndTime=end)
+        values = {r['Id']: r['Values'] for r in response['MetricDataResults']}
+        invocations = sum(values.get('invocations', []))
+        errors = sum(values.get('errors', []))
+        latency = values.get('latency') or []
+        return {
+            'invocations': invocations,
+            'error_rate': errors / invocations if invocations else 0.0,
+            # ModelLatency is reported in microseconds
+            'latency_ms': max(latency) / 1000.0 if latency else None,
+        }
+
+class SimulatedEndpoint:
+    """In-memory endpoint for exercising the controller without AWS.
+
+    Each variant has a fixed latency and error rate; traffic is split by
+    the current weights at requests_per_second, and time only moves when
+    the controller sleeps.
+    """
+
+    def __init__(self, profiles, requests_per_second=20.0):
+        self.profiles = profiles
+        self.requests_per_second = requests_per_second
+        self.weights = {name: 0.0 for name in profiles}
+        self.now = 0.0
+        self.history = []
+
+    def set_weights(self, weights):
+        self.weights.update(weights)
+        self.history.append((self.now, dict(self.weights)))
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def clock(self):
+        return self.now
+
+    def variant_metrics(self, variant, start, end):
+        total = sum(self.weights.values()) or 1.0
+        share = self.weights[variant] / total
+        profile = self.profiles[variant]
+        return {
+            'invocations': int(self.requests_per_second * share * (end - start)),
+            'error_rate': profile['error_rate'],
+            'latency_ms': profile['latency_ms'],
+        }
+
+class TrafficShiftController:
+    """Moves traffic from old_variant to new_variant step by step, rolling back on regression"""
+
+    def __init__(self, endpoint, old_variant, new_variant, steps=None, bake_seconds=DEFAULT_BAKE_SECONDS,
+                 check_seconds=DEFAULT_CHECK_SECONDS, thresholds=None, sleep=time.sleep, clock=time.time):
+        self.endpoint = endpoint
+        self.old_variant = old_variant
+        self.new_variant = new_variant
+        self.steps = steps or DEFAULT_STEPS
+        self.bake_seconds = bake_seconds
+        self.check_seconds = check_seconds
+        self.thresholds = thresholds or Thresholds()
+        self.sleep = sleep
+        self.clock = clock
+
+    def weights(self, percent):
+        return {self.old_variant: 100 - percent, self.new_variant: percent}
+
+    def bake(self, percent):
+        """Watch both variants for bake_seconds; return the regression reason or None"""
+        start = self.clock()
+        while self.clock() - start < self.bake_seconds:
+            self.sleep(self.check_seconds)
+            if percent == 100:
+                # No old traffic left to compare with; hold the new variant to the absolute limits
+                old = {'error_rate': 0.0, 'latency_ms': None}
+            else:
+                old = self.endpoint.variant_metrics(self.old_variant, start, self.clock())
+            new = self.endpoint.variant_metrics(self.new_variant, start, self.clock())
+            reason = self.thresholds.regression(new, old)
+            if reason:
+                return reason
+        return None
+
+    def run(self):
+        """True if the new variant ends up with all traffic, False if it was rolled back"""
+        for percent in self.steps:
+            print(f"🔀 Shifting {percent}% of traffic to {self.new_variant}")
+            self.endpoint.set_weights(self.weights(percent))
+            reason = self.bake(percent)
+            if reason:
+                print(f"⏪ Rolling back {self.new_variant} at {percent}%: {reason}")
+                self.endpoint.set_weights(self.weights(0))
+                return False
+        print(f"✅ {self.new_variant} is serving all traffic")
+        return True
+
+def simulate():
+    parser = argparse.ArgumentParser(description='Simulate a traffic-shifting deploy without AWS')
+    parser.add_argument('--old-latency-ms', type=float, default=40.0)
+    parser.add_argument('--old-error-rate', type=float, default=0.001)
+    parser.add_argument('--new-latency-ms', type=float, default=42.0)
+    parser.add_argument('--new-error-rate', type=float, default=0.001)
+    parser.add_argument('--requests-per-second', type=float, default=20.0)
+    parser.add_argument('--bake-seconds', type=float, default=DEFAULT_BAKE_SECONDS)
+    args = parser.parse_args()
+
+    endpoint = SimulatedEndpoint({
+        'old': {'latency_ms': args.old_latency_ms, 'error_rate': args.old_error_rate},
+        'new': {'latency_ms': args.new_latency_ms, 'error_rate': args.new_error_rate},
+    }, args.requests_per_second)
+    controller = TrafficShiftController(endpoint, 'old', 'new', bake_seconds=args.bake_seconds,
+                                        sleep=endpoint.sleep, clock=endpoint.clock)
+    promoted = controller.run()
+    for at, weights in endpoint.history:
+        print(f"t={at:>6.0f}s weights={weights}")
+    return promoted
+
+if __name__ == '__main__':
+    exit(0 if simulate() else 1)
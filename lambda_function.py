@@ -1,359 +1,467 @@
+import base64
+import hashlib
 import json
-import boto3
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from stage_metrics import MetricsRecorder
+
+# Cold start: only the standard library modules above load with the
+# function. boto3/botocore are imported when a POST first needs a client,
+# gzip/brotli when the UI is first served and tarfile when a model.tar.gz
+# is read, so each route pays only for what it uses.
+
+ENDPOINT_NAME = os.environ.get('ENDPOINT_NAME', 'loan-endpoint')  # Matches deploy_model.py
+
+# Leveled logging: the per-invocation summary goes out at INFO for a
+# LOG_SAMPLE_RATE fraction of invocations and at DEBUG for the rest, so
+# LOG_LEVEL=DEBUG logs every invocation. Errors are always logged.
+logger = logging.getLogger('loan-prediction')
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '0.01'))
+
+# Sampled per-stage timings as embedded metric format lines (code/stage_metrics.py)
+METRICS = MetricsRecorder('lambda')
+
+# AWS clients, created once per container on first use and reused by every
+# warm invocation instead of being rebuilt per request
+sagemaker_runtime = None
+_s3_client = None
+
+def client_config():
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=int(os.environ.get('SAGEMAKER_MAX_POOL_CONNECTIONS', '10')),
+        tcp_keepalive=True,
+        connect_timeout=float(os.environ.get('SAGEMAKER_CONNECT_TIMEOUT', '2')),
+        read_timeout=float(os.environ.get('SAGEMAKER_READ_TIMEOUT', '10')),
+        retries={'max_attempts': int(os.environ.get('SAGEMAKER_MAX_ATTEMPTS', '3')), 'mode': 'standard'},
+    )
+
+def get_sagemaker_runtime():
+    global sagemaker_runtime
+    if sagemaker_runtime is None:
+        import boto3
+        sagemaker_runtime = boto3.client('sagemaker-runtime', config=client_config())
+    return sagemaker_runtime
+
+def get_s3_client():
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+        _s3_client = boto3.client('s3', config=client_config())
+    return _s3_client
+
+# Optional in-process scoring with the exported model.json (see
+# code/linear_scorer.py, packaged next to this file). The SageMaker endpoint
+# stays the fallback whenever the local model is unavailable.
+SCORING_MODE = os.environ.get('SCORING_MODE', 'endpoint')  # 'endpoint' or 'local'
+LOCAL_MODEL_URI = os.environ.get('LOCAL_MODEL_URI', '')  # s3://.../model.json or .../model.tar.gz
+LOCAL_MODEL_REFRESH_SECONDS = float(os.environ.get('LOCAL_MODEL_REFRESH_SECONDS', '300'))
+_local_model = {'scorer': None, 'etag': None, 'checked_at': None}
+
+def split_s3_uri(uri):
+    bucket, _, key = uri.replace('s3://', '', 1).partition('/')
+    return bucket, key
+
+def read_model_spec(s3, uri):
+    """Return (model.json text, ETag) from a model.json object or a model.tar.gz artifact"""
+    bucket, key = split_s3_uri(uri)
+    obj = s3.get_object(Bucket=bucket, Key=key)
+    data = obj['Body'].read()
+    if key.endswith('.tar.gz'):
+        import io
+        import tarfile
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+            member = next(m for m in tar.getmembers() if os.path.basename(m.name) == 'model.json')
+            data = tar.extractfile(member).read()
+    return data.decode('utf-8'), obj['ETag']
+
+def get_local_scorer():
+    """The per-container local scorer, loaded on first use and re-checked by ETag periodically"""
+    if SCORING_MODE != 'local' or not LOCAL_MODEL_URI:
+        return None
+
+    state = _local_model
+    now = time.monotonic()
+    if state['checked_at'] is not None and now - state['checked_at'] < LOCAL_MODEL_REFRESH_SECONDS:
+        return state['scorer']
+    state['checked_at'] = now
+
+    try:
+        from linear_scorer import LinearScorer
+
+        s3 = get_s3_client()
+        if state['etag'] is not None:
+            bucket, key = split_s3_uri(LOCAL_MODEL_URI)
+            if s3.head_object(Bucket=bucket, Key=key)['ETag'] == state['etag']:
+                return state['scorer']
+
+        spec_json, etag = read_model_spec(s3, LOCAL_MODEL_URI)
+        spec = json.loads(spec_json)
+        if spec.get('disabled'):
+            # The deployed model has no local export (deploy_model.publish_serving_model)
+            state['scorer'], state['etag'] = None, etag
+            logger.info("Model %s has no local export, using endpoint", spec.get('model_version'))
+            return None
+        scorer = LinearScorer(spec)
+        scorer.model_version = scorer.model_version or etag
+        state['scorer'], state['etag'] = scorer, etag
+        logger.info("Local scoring enabled with model %s", scorer.model_version)
+    except Exception as e:
+        # Keep serving with the previous model (or the endpoint) until the next check
+        logger.warning("Local model unavailable, using %s: %s",
+                       'previous model' if state['scorer'] else 'endpoint', e)
+    return state['scorer']
+
+def score_locally(application):
+    """Score in process; None means the caller should use the endpoint"""
+    scorer = get_local_scorer()
+    if scorer is None or not isinstance(application, dict):
+        return None, None
+    try:
+        label, probability = scorer.predict(application)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning("Local scoring failed, using endpoint: %s", e)
+        return None, None
+    result = {
+        'prediction': 'Approved' if label == 1 else 'Rejected',
+        'confidence': max(probability)
+    }
+    return result, scorer.model_version
+
+# Static UI assets packaged next to this file, loaded once per container
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+STATIC_CACHE_CONTROL = os.environ.get('STATIC_CACHE_CONTROL', 'public, max-age=86400, stale-while-revalidate=604800')
+STATIC_CONTENT_TYPES = {'.html': 'text/html; charset=utf-8', '.js': 'application/javascript', '.css': 'text/css'}
+_static_assets = {}
+# Must match binary_media_types of the API (terraform/modules/api-gateway):
+# API Gateway only turns a base64 body back into bytes when the request's
+# first Accept type is one of these, so any other client gets identity
+BINARY_MEDIA_TYPES = ('text/html',)
+
+class StaticAsset:
+    """A packaged file held in memory with precompressed variants and a content-hash ETag"""
+
+    def __init__(self, name):
+        import gzip
+        try:
+            import brotli
+        except ImportError:  # Not in the Lambda runtime unless packaged; gzip only
+            brotli = None
+
+        with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+            body = f.read()
+        self.content_type = STATIC_CONTENT_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.variants = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body)
+
+    def choose_encoding(self, accept_encoding):
+        """Best precompressed variant the client accepts (br, then gzip)"""
+        accepted = set()
+        for token in (accept_encoding or '').split(','):
+            coding, _, params = token.partition(';')
+            params = params.replace(' ', '')
+            try:
+                quality = float(params[2:]) if params.startswith('q=') else 1.0
+            except ValueError:
+                quality = 0.0
+            if quality > 0:
+                accepted.add(coding.strip().lower())
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+
+    def matches(self, if_none_match):
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or self.etag in tags or 'W/' + self.etag in tags
+
+def get_header(event, name):
+    """Case-insensitive request header lookup"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+def accepts_binary(event):
+    """True if API Gateway will decode a base64 body for this request (see BINARY_MEDIA_TYPES)"""
+    accept = get_header(event, 'Accept') or ''
+    first = accept.split(',', 1)[0].split(';', 1)[0].strip().lower()
+    return first in BINARY_MEDIA_TYPES
+
+def serve_static(event, name):
+    """Serve a packaged asset with ETag revalidation and precompressed bodies"""
+    asset = _static_assets.get(name)
+    if asset is None:
+        asset = _static_assets[name] = StaticAsset(name)
+
+    headers = {
+        'Content-Type': asset.content_type,
+        'Cache-Control': STATIC_CACHE_CONTROL,
+        'ETag': asset.etag,
+        'Vary': 'Accept-Encoding',
+        'Access-Control-Allow-Origin': '*'
+    }
+    if asset.matches(get_header(event, 'If-None-Match')):
+        return {'statusCode': 304, 'headers': headers, 'body': ''}
+
+    encoding = 'identity'
+    if accepts_binary(event):
+        encoding = asset.choose_encoding(get_header(event, 'Accept-Encoding'))
+    if encoding == 'identity':
+        return {'statusCode': 200, 'headers': headers, 'body': asset.variants['identity'].decode('utf-8')}
+
+    headers['Content-Encoding'] = encoding
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': base64.b64encode(asset.variants[encoding]).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
+# Application fields that make up the model's feature vector; mirrors
+# code/features.py, which is not packaged with the Lambda
+CACHE_CATEGORY_MAPS = {
+    'education': {'Graduate': 0, 'Not Graduate': 1},
+    'self_employed': {'No': 0, 'Yes': 1},
+}
+CACHE_NUMERIC_FIELDS = ['no_of_dependents', 'income_annum', 'loan_amount', 'loan_term', 'credit_score']
+CACHE_ASSET_FIELDS = ['residential_assets_value', 'commercial_assets_value',
+                      'luxury_assets_value', 'bank_asset_value']
+
+def _number(value):
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+def feature_key(application):
+    """Hash of the application's normalized feature vector, or None if it cannot be normalized.
+
+    Whitespace in labels, ints vs floats vs numeric strings, key order and
+    how the assets are split up do not change the model input, so they do
+    not change the key either.
+    """
+    try:
+        features = [_number(application[field]) for field in CACHE_NUMERIC_FIELDS]
+        for field, mapping in CACHE_CATEGORY_MAPS.items():
+            features.append(mapping[application[field].strip()])
+        if all(field in application for field in CACHE_ASSET_FIELDS):
+            features.append(_number(sum(_number(application[field]) for field in CACHE_ASSET_FIELDS)))
+        else:
+            features.append(_number(application['total_asset']))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    return hashlib.sha256(json.dumps(features).encode('utf-8')).hexdigest()
+
+class PredictionCache:
+    """Bounded LRU cache with a TTL, keyed by (model version, feature key).
+
+    model_version is the version the endpoint last answered with; lookups
+    use it. While a canary serves two versions, entries of both stay
+    cached side by side, and entries of a retired version age out through
+    the LRU and the TTL. Predictions without a known model version are not
+    cached.
+    """
+
+    def __init__(self, max_entries, ttl_seconds, model_version=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'version_changes': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if key is None or self.model_version is None or self.max_entries <= 0:
+            return None
+        key = (self.model_version, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, value, model_version):
+        """Cache value for the application key as scored by model_version"""
+        if key is None or model_version is None or self.max_entries <= 0:
+            return
+        key = (model_version, key)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def set_model_version(self, model_version):
+        """Look up entries of model_version from now on"""
+        if not model_version or model_version == self.model_version:
+            return
+        if self.model_version is not None:
+            self.stats['version_changes'] += 1
+        self.model_version = model_version
+
+    def __len__(self):
+        return len(self._entries)
+
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', '1024')),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', '300')),
+    model_version=os.environ.get('MODEL_VERSION'),
+)
+
+# Per-container counters: the first invocation is the cold start
+CONTAINER_STATS = {'invocations': 0, 'cold_starts': 0, 'warm_starts': 0}
+
+def record_invocation():
+    """Count this invocation and return True if it is the container's cold start"""
+    CONTAINER_STATS['invocations'] += 1
+    cold_start = CONTAINER_STATS['invocations'] == 1
+    CONTAINER_STATS['cold_starts' if cold_start else 'warm_starts'] += 1
+    return cold_start
 
 def lambda_handler(event, context):
     """Lambda function to serve HTML UI and handle predictions via SageMaker Endpoint"""
-    # Updated: 2025-11-28-14:30 - Add debug logging
-    
+    cold_start = record_invocation()
+    timer = METRICS.start(request_id=getattr(context, 'aws_request_id', None), always=cold_start)
     try:
-        print(f"Event received: {json.dumps(event)}")
-        print(f"Lambda invoked with method: {event.get('httpMethod')}")
-        # Handle GET request - serve HTML UI
-        if event.get('httpMethod') == 'GET':
-            html_content = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AI Loan Prediction System</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        .container {
-            max-width: 900px;
-            margin: 0 auto;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 20px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-            overflow: hidden;
-            backdrop-filter: blur(10px);
-        }
-        .header {
-            background: linear-gradient(135deg, #ff6b6b, #feca57);
-            padding: 40px;
-            text-align: center;
-            color: white;
-        }
-        .header h1 {
-            font-size: 2.5rem;
-            margin-bottom: 10px;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        }
-        .header p {
-            font-size: 1.2rem;
-            opacity: 0.9;
-        }
-        .form-container {
-            padding: 40px;
-        }
-        .form-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 25px;
-            margin-bottom: 30px;
-        }
-        .form-group {
-            position: relative;
-        }
-        .form-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #333;
-            font-size: 0.95rem;
-        }
-        .form-group input, .form-group select {
-            width: 100%;
-            padding: 15px;
-            border: 2px solid #e1e8ed;
-            border-radius: 12px;
-            font-size: 1rem;
-            transition: all 0.3s ease;
-            background: #f8f9fa;
-        }
-        .form-group input:focus, .form-group select:focus {
-            outline: none;
-            border-color: #667eea;
-            background: white;
-            box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1);
-            transform: translateY(-2px);
-        }
-        .submit-btn {
-            width: 100%;
-            padding: 18px;
-            background: linear-gradient(135deg, #667eea, #764ba2);
-            color: white;
-            border: none;
-            border-radius: 12px;
-            font-size: 1.2rem;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-        .submit-btn:hover {
-            transform: translateY(-3px);
-            box-shadow: 0 10px 25px rgba(102, 126, 234, 0.4);
-        }
-        .submit-btn:active {
-            transform: translateY(-1px);
-        }
-        .result {
-            margin-top: 30px;
-            padding: 25px;
-            border-radius: 15px;
-            text-align: center;
-            animation: slideIn 0.5s ease;
-        }
-        .approved {
-            background: linear-gradient(135deg, #56ab2f, #a8e6cf);
-            color: white;
-            box-shadow: 0 10px 25px rgba(86, 171, 47, 0.3);
-        }
-        .rejected {
-            background: linear-gradient(135deg, #ff416c, #ff4757);
-            color: white;
-            box-shadow: 0 10px 25px rgba(255, 65, 108, 0.3);
-        }
-        .result h3 {
-            font-size: 1.8rem;
-            margin-bottom: 10px;
-        }
-        .result p {
-            font-size: 1.2rem;
-            opacity: 0.9;
-        }
-        .loading {
-            display: none;
-            text-align: center;
-            padding: 20px;
-        }
-        .spinner {
-            border: 4px solid #f3f3f3;
-            border-top: 4px solid #667eea;
-            border-radius: 50%;
-            width: 40px;
-            height: 40px;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 15px;
-        }
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-        @keyframes slideIn {
-            from { opacity: 0; transform: translateY(30px); }
-            to { opacity: 1; transform: translateY(0); }
+        response = handle_request(event, timer)
+    except Exception as e:
+        logger.exception("Lambda error handling %s request", event.get('httpMethod'))
+        response = {
+            'statusCode': 500,
+            'headers': {'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': str(e)})
         }
 
-        @media (max-width: 768px) {
-            .form-grid { grid-template-columns: 1fr; }
-            .header h1 { font-size: 2rem; }
-            .container { margin: 10px; }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🤖 AI Loan Prediction System</h1>
-            <p>Get instant loan approval decisions powered by machine learning</p>
-        </div>
-        <div class="form-container">
-            <form id="loanForm">
-                <div class="form-grid">
-                    <div class="form-group">
-                        <label for="no_of_dependents">👨‍👩‍👧‍👦 Number of Dependents</label>
-                        <input type="number" id="no_of_dependents" name="no_of_dependents" min="0" max="10" placeholder="e.g., 2" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="education">🎓 Education Level</label>
-                        <select id="education" name="education" required>
-                            <option value="">Select Education Level</option>
-                            <option value="Graduate">Graduate</option>
-                            <option value="Not Graduate">Not Graduate</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="self_employed">💼 Employment Status</label>
-                        <select id="self_employed" name="self_employed" required>
-                            <option value="">Select Employment Status</option>
-                            <option value="Yes">Self Employed</option>
-                            <option value="No">Employed</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="income_annum">💰 Annual Income (₹)</label>
-                        <input type="number" id="income_annum" name="income_annum" min="100000" max="50000000" placeholder="e.g., 5000000" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="loan_amount">🏦 Loan Amount (₹)</label>
-                        <input type="number" id="loan_amount" name="loan_amount" min="100000" max="50000000" placeholder="e.g., 2000000" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="loan_term">📅 Loan Term (Years)</label>
-                        <input type="number" id="loan_term" name="loan_term" min="1" max="30" placeholder="e.g., 15" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="credit_score">📊 Credit Score</label>
-                        <input type="number" id="credit_score" name="credit_score" min="300" max="900" placeholder="e.g., 750" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="residential_assets_value">🏠 Residential Assets (₹)</label>
-                        <input type="number" id="residential_assets_value" name="residential_assets_value" min="0" max="100000000" placeholder="e.g., 8000000" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="commercial_assets_value">🏢 Commercial Assets (₹)</label>
-                        <input type="number" id="commercial_assets_value" name="commercial_assets_value" min="0" max="100000000" placeholder="e.g., 1000000" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="luxury_assets_value">💎 Luxury Assets (₹)</label>
-                        <input type="number" id="luxury_assets_value" name="luxury_assets_value" min="0" max="100000000" placeholder="e.g., 500000" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="bank_asset_value">🏛️ Bank Assets (₹)</label>
-                        <input type="number" id="bank_asset_value" name="bank_asset_value" min="0" max="100000000" placeholder="e.g., 2000000" required>
-                    </div>
-                </div>
-                
-                <button type="submit" class="submit-btn">🚀 Get AI Prediction</button>
-            </form>
-            
-            <div class="loading" id="loading">
-                <div class="spinner"></div>
-                <p>AI is analyzing your application...</p>
-            </div>
-            
-            <div id="result"></div>
-        </div>
-    </div>
-    
-    <script>
-        document.getElementById('loanForm').addEventListener('submit', async function(e) {
-            e.preventDefault();
-            
-            const formData = new FormData(e.target);
-            const data = Object.fromEntries(formData.entries());
-            
-            ['no_of_dependents', 'income_annum', 'loan_amount', 'loan_term', 'credit_score', 
-             'residential_assets_value', 'commercial_assets_value', 'luxury_assets_value', 'bank_asset_value'].forEach(field => {
-                data[field] = parseInt(data[field]);
-            });
-            
-            // Show loading
-            document.getElementById('loading').style.display = 'block';
-            document.getElementById('result').innerHTML = '';
-            
-            try {
-                const response = await fetch(window.location.href, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(data)
-                });
-                
-                const result = await response.json();
-                
-                // Hide loading
-                document.getElementById('loading').style.display = 'none';
-                
-                const resultDiv = document.getElementById('result');
-                if (result.prediction === 'Approved') {
-                    resultDiv.innerHTML = '<div class="result approved"><h3>🎉 Congratulations! Loan Approved!</h3><p>AI Confidence: ' + (result.confidence * 100).toFixed(1) + '%</p><p>Your application has been successfully processed.</p></div>';
-                } else {
-                    resultDiv.innerHTML = '<div class="result rejected"><h3>😔 Loan Application Declined</h3><p>AI Confidence: ' + (result.confidence * 100).toFixed(1) + '%</p><p>Please review your financial profile and try again.</p></div>';
-                }
-            } catch (error) {
-                document.getElementById('loading').style.display = 'none';
-                document.getElementById('result').innerHTML = '<div class="result rejected"><h3>⚠️ System Error</h3><p>' + error.message + '</p><p>Please try again later.</p></div>';
+    timer.emit(Method=event.get('httpMethod'), StatusCode=response['statusCode'], ColdStart=cold_start)
+    level = logging.INFO if cold_start or random.random() < LOG_SAMPLE_RATE else logging.DEBUG
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s -> %s (%s start, invocation %d)", event.get('httpMethod'), response['statusCode'],
+                   'cold' if cold_start else 'warm', CONTAINER_STATS['invocations'])
+    return response
+
+def handle_request(event, timer):
+    # Handle GET request - serve HTML UI from the in-memory static asset
+    if event.get('httpMethod') == 'GET':
+        return serve_static(event, 'index.html')
+
+    elif event.get('httpMethod') == 'POST':
+        if not event.get('body'):
+            return {
+                'statusCode': 400,
+                'headers': {'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Request body is required'})
             }
-        });
-    </script>
-</body>
-</html>"""
-            
+
+        body = json.loads(event['body'])
+        timer.lap('parse')
+
+        # Identical applications (retries, double clicks, re-quotes) skip the endpoint
+        cache_key = feature_key(body) if isinstance(body, dict) else None
+        cached = prediction_cache.get(cache_key)
+        timer.lap('cache_lookup')
+        if cached is not None:
+            timer.set('Cache', 'Hit')
+            timer.set('ModelVersion', prediction_cache.model_version)
             return {
                 'statusCode': 200,
                 'headers': {
-                    'Content-Type': 'text/html',
-                    'Access-Control-Allow-Origin': '*'
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'X-Cache': 'Hit'
                 },
-                'body': html_content
+                'body': cached
             }
-        
-        elif event.get('httpMethod') == 'POST':
-            if not event.get('body'):
-                return {
-                    'statusCode': 400,
-                    'headers': {'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'Request body is required'})
-                }
-            
-            body = json.loads(event['body'])
-            
-            # Call SageMaker endpoint
-            sagemaker_runtime = boto3.client('sagemaker-runtime')
-            endpoint_name = 'loan-endpoint'  # Matches deploy_model.py
-            
-            try:
-                response = sagemaker_runtime.invoke_endpoint(
-                    EndpointName=endpoint_name,
-                    ContentType='application/json',
-                    Body=json.dumps(body)
-                )
-                
-                result_body = response['Body'].read().decode('utf-8')
-                sagemaker_result = json.loads(result_body)
-                
-                result = {
-                    'prediction': sagemaker_result['loan_status'],
-                    'confidence': sagemaker_result['confidence']
-                }
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps(result)
-                }
-                
-            except Exception as endpoint_error:
-                return {
-                    'statusCode': 500,
-                    'headers': {'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': f'SageMaker endpoint error: {str(endpoint_error)}'})
-                }
-        
-        else:
+        timer.set('Cache', 'Miss')
+
+        # Score in process when local mode is enabled and the model is loaded
+        result, model_version = score_locally(body)
+        timer.lap('local_score')
+        if result is not None:
+            result_json = json.dumps(result)
+            prediction_cache.set_model_version(model_version)
+            prediction_cache.put(cache_key, result_json, model_version)
+            timer.set('ScoredBy', 'local')
+            timer.set('ModelVersion', model_version)
             return {
-                'statusCode': 405,
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'X-Cache': 'Miss',
+                    'X-Scored-By': 'local'
+                },
+                'body': result_json
+            }
+
+        # Call SageMaker endpoint with the container-wide client
+        timer.set('ScoredBy', 'endpoint')
+        try:
+            if sagemaker_runtime is None:
+                get_sagemaker_runtime()
+                timer.lap('client_setup')
+            response = sagemaker_runtime.invoke_endpoint(
+                EndpointName=ENDPOINT_NAME,
+                ContentType='application/json',
+                Body=json.dumps(body)
+            )
+            timer.lap('invoke_endpoint')
+
+            result_body = response['Body'].read().decode('utf-8')
+            sagemaker_result = json.loads(result_body)
+            timer.lap('read_response')
+
+            result = {
+                'prediction': sagemaker_result['loan_status'],
+                'confidence': sagemaker_result['confidence']
+            }
+            result_json = json.dumps(result)
+
+            # The container reports the model it scored with (MODEL_VERSION, set by deploy_model.py)
+            model_version = sagemaker_result.get('model_version')
+            prediction_cache.set_model_version(model_version)
+            prediction_cache.put(cache_key, result_json, model_version)
+            timer.set('ModelVersion', model_version)
+            timer.set('Variant', response.get('InvokedProductionVariant'))
+
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'X-Cache': 'Miss',
+                    'X-Scored-By': 'endpoint'
+                },
+                'body': result_json
+            }
+
+        except Exception as endpoint_error:
+            timer.lap('invoke_endpoint')
+            logger.warning("SageMaker endpoint error: %s", endpoint_error)
+            return {
+                'statusCode': 500,
                 'headers': {'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Method not allowed'})
+                'body': json.dumps({'error': f'SageMaker endpoint error: {str(endpoint_error)}'})
             }
-            
-    except Exception as e:
-        print(f"Lambda error: {str(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+
+    else:
         return {
-            'statusCode': 500,
+            'statusCode': 405,
             'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+            'body': json.dumps({'error': 'Method not allowed'})
+        }
@@ -1,8 +1,29 @@
 import json
+import os
 import boto3
+from botocore.config import Config
+
+ENDPOINT_NAME = os.environ.get('ENDPOINT_NAME', 'loan-endpoint')
+
+# Created once per container and reused across warm invocations
+runtime = boto3.client(
+    'sagemaker-runtime',
+    region_name='eu-central-1',
+    config=Config(
+        max_pool_connections=int(os.environ.get('SAGEMAKER_MAX_POOL_CONNECTIONS', '10')),
+        tcp_keepalive=True,
+        connect_timeout=float(os.environ.get('SAGEMAKER_CONNECT_TIMEOUT', '2')),
+        read_timeout=float(os.environ.get('SAGEMAKER_READ_TIMEOUT', '10')),
+        retries={'max_attempts': int(os.environ.get('SAGEMAKER_MAX_ATTEMPTS', '3')), 'mode': 'standard'},
+    ),
+)
+
+CONTAINER_STATS = {'invocations': 0, 'cold_starts': 0, 'warm_starts': 0}
 
 def lambda_handler(event, context):
     """Simple CORS proxy for SageMaker endpoint"""
+    CONTAINER_STATS['invocations'] += 1
+    CONTAINER_STATS['cold_starts' if CONTAINER_STATS['invocations'] == 1 else 'warm_starts'] += 1
     
     # Handle CORS preflight
     if event['httpMethod'] == 'OPTIONS':
@@ -21,9 +42,8 @@ def lambda_handler(event, context):
         body = json.loads(event['body'])
         
         # Call SageMaker
-        runtime = boto3.client('sagemaker-runtime', region_name='eu-central-1')
         response = runtime.invoke_endpoint(
-            EndpointName='loan-endpoint',
+            EndpointName=ENDPOINT_NAME,
             ContentType='application/json',
             Body=json.dumps(body)
         )
@@ -1,4 +1,6 @@
-# Create Lambda deployment package
+# Create Lambda deployment package. The zip is rebuilt from these sources
+# on every plan with fixed entry timestamps, so its hash only changes when a
+# source does; the function is updated (and warm containers replaced) only then.
 data "archive_file" "lambda_zip" {
   type        = "zip"
   output_path = "${path.module}/lambda_function.zip"
@@ -7,15 +9,19 @@ data "archive_file" "lambda_zip" {
     content = file("${path.module}/../lambda_function.py")
     filename = "lambda_function.py"
   }
-  
-  # Force recreation when file changes
-  depends_on = [null_resource.lambda_trigger]
-}
 
-# Trigger to force Lambda update
-resource "null_resource" "lambda_trigger" {
-  triggers = {
-    lambda_hash = filebase64sha256("${path.module}/../lambda_function.py")
-    timestamp = timestamp()
+  source {
+    content  = file("${path.module}/../static/index.html")
+    filename = "static/index.html"
+  }
+
+  source {
+    content  = file("${path.module}/../code/linear_scorer.py")
+    filename = "linear_scorer.py"
   }
-}
\ No newline at end of file
+
+  source {
+    content  = file("${path.module}/../code/stage_metrics.py")
+    filename = "stage_metrics.py"
+  }
+}
@@ -11,11 +11,18 @@ module "iam" {
 }
 
 module "codebuild" {
-  source              = "./modules/codebuild"
-  project_name        = var.project_name
-  codebuild_role_arn  = module.iam.codebuild_role_arn
-  sagemaker_role_arn  = module.iam.sagemaker_role_arn
-  s3_bucket_name      = module.s3.ml_bucket_name
+  source                    = "./modules/codebuild"
+  project_name              = var.project_name
+  codebuild_role_arn        = module.iam.codebuild_role_arn
+  sagemaker_role_arn        = module.iam.sagemaker_role_arn
+  s3_bucket_name            = module.s3.ml_bucket_name
+  training_events_queue_url = module.training_events.queue_url
+}
+
+# Training job state change events for the pipeline's training wait
+module "training_events" {
+  source       = "./modules/training-events"
+  project_name = var.project_name
 }
 
 # Endpoint deployment CodeBuild project
@@ -61,5 +68,8 @@ module "lambda" {
   source                    = "./modules/lambda"
   function_name            = "${var.project_name}-proxy"
   lambda_zip_path          = data.archive_file.lambda_zip.output_path
+  lambda_zip_hash          = data.archive_file.lambda_zip.output_base64sha256
   api_gateway_execution_arn = module.api_gateway.api_gateway_execution_arn
+  scoring_mode              = var.lambda_scoring_mode
+  local_model_uri           = "s3://${module.s3.ml_bucket_name}/serving/model.json"
 }
\ No newline at end of file
@@ -3,6 +3,12 @@ resource "aws_api_gateway_rest_api" "loan_prediction_api" {
   name        = var.api_name
   description = "API for Loan Prediction ML Model"
 
+  # Lets the Lambda return the precompressed (base64) UI for browser GETs.
+  # API Gateway decodes only when the request's first Accept type matches,
+  # so the Lambda compresses only then (BINARY_MEDIA_TYPES must match this);
+  # JSON API calls are not matched and stay text
+  binary_media_types = ["text/html"]
+
   endpoint_configuration {
     types = ["REGIONAL"]
   }
@@ -183,6 +189,7 @@ resource "aws_api_gateway_deployment" "api_deployment" {
   
   triggers = {
     redeployment = sha1(jsonencode([
+      aws_api_gateway_rest_api.loan_prediction_api.binary_media_types,
       aws_api_gateway_resource.predict.id,
       aws_api_gateway_method.root_get.id,
       aws_api_gateway_method.root_post.id,
@@ -30,6 +30,11 @@ resource "aws_codebuild_project" "mlops_build" {
       value = var.s3_bucket_name
     }
 
+    environment_variable {
+      name  = "TRAINING_EVENTS_QUEUE_URL"
+      value = var.training_events_queue_url
+    }
+
     environment_variable {
       name  = "MODEL_PACKAGE_GROUP_NAME"
       value = "loan-prediction-models"
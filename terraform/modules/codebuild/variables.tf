@@ -22,4 +22,10 @@ variable "buildspec_file" {
   description = "Path to the buildspec file"
   type        = string
   default     = "buildspec.yml"
-}
\ No newline at end of file
+}
+
+variable "training_events_queue_url" {
+  description = "SQS queue with SageMaker training job state changes; empty to poll only"
+  type        = string
+  default     = ""
+}
@@ -73,10 +73,20 @@ resource "aws_iam_role_policy" "codebuild_policy" {
         Action = [
           "logs:CreateLogGroup",
           "logs:CreateLogStream",
-          "logs:PutLogEvents"
+          "logs:PutLogEvents",
+          "logs:FilterLogEvents"
         ]
         Resource = "arn:aws:logs:*:*:*"
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:ChangeMessageVisibility"
+        ]
+        Resource = "arn:aws:sqs:*:*:${var.project_name}-training-events"
+      },
       {
         Effect = "Allow"
         Action = [
@@ -95,6 +105,12 @@ resource "aws_iam_role_policy" "codebuild_policy" {
         Effect = "Allow"
         Action = [
           "sagemaker:*",
+          "cloudwatch:GetMetricData",
+          "cloudwatch:PutMetricAlarm",
+          "cloudwatch:DescribeAlarms",
+          "cloudwatch:DeleteAlarms",
+          "application-autoscaling:*",
+          "iam:CreateServiceLinkedRole",
           "iam:PassRole",
           "ecr:BatchCheckLayerAvailability",
           "ecr:GetDownloadUrlForLayer",
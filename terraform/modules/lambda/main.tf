@@ -1,12 +1,20 @@
 # Lambda function for SageMaker proxy
 resource "aws_lambda_function" "sagemaker_proxy" {
   filename         = var.lambda_zip_path
+  source_code_hash = var.lambda_zip_hash
   function_name    = var.function_name
   role            = aws_iam_role.lambda_role.arn
   handler         = "lambda_function.lambda_handler"
   runtime         = "python3.9"
   timeout         = 30
 
+  environment {
+    variables = {
+      SCORING_MODE    = var.scoring_mode
+      LOCAL_MODEL_URI = var.local_model_uri
+    }
+  }
+
   depends_on = [
     aws_iam_role_policy_attachment.lambda_logs,
     aws_iam_role_policy.lambda_sagemaker,
@@ -9,7 +9,24 @@ variable "lambda_zip_path" {
   type        = string
 }
 
+variable "lambda_zip_hash" {
+  description = "Base64 SHA-256 of the deployment package; the function code is updated when it changes"
+  type        = string
+}
+
 variable "api_gateway_execution_arn" {
   description = "API Gateway execution ARN for Lambda permissions"
   type        = string
+}
+
+variable "scoring_mode" {
+  description = "Where POST predictions are scored: endpoint (SageMaker) or local (in-process, endpoint as fallback)"
+  type        = string
+  default     = "endpoint"
+}
+
+variable "local_model_uri" {
+  description = "S3 URI of the exported model.json used by local scoring mode"
+  type        = string
+  default     = ""
 }
\ No newline at end of file
@@ -0,0 +1,49 @@
+# SageMaker training job state changes, delivered to a queue the pipeline
+# long-polls while it waits for its training job
+resource "aws_sqs_queue" "training_events" {
+  name                      = "${var.project_name}-training-events"
+  message_retention_seconds = 3600
+
+  tags = {
+    Name    = "${var.project_name}-training-events"
+    Project = var.project_name
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "training_state_change" {
+  name        = "${var.project_name}-training-state-change"
+  description = "SageMaker training job state changes of the pipeline's jobs"
+
+  event_pattern = jsonencode({
+    source        = ["aws.sagemaker"]
+    "detail-type" = ["SageMaker Training Job State Change"]
+    # Only this pipeline's jobs (Pipeline/sagemaker_pipeline.py names them loan-model-<time>)
+    detail = {
+      TrainingJobName = [{ prefix = var.training_job_prefix }]
+    }
+  })
+}
+
+resource "aws_cloudwatch_event_target" "training_events_queue" {
+  rule = aws_cloudwatch_event_rule.training_state_change.name
+  arn  = aws_sqs_queue.training_events.arn
+}
+
+resource "aws_sqs_queue_policy" "training_events" {
+  queue_url = aws_sqs_queue.training_events.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect    = "Allow"
+        Principal = { Service = "events.amazonaws.com" }
+        Action    = "sqs:SendMessage"
+        Resource  = aws_sqs_queue.training_events.arn
+        Condition = {
+          ArnEquals = { "aws:SourceArn" = aws_cloudwatch_event_rule.training_state_change.arn }
+        }
+      }
+    ]
+  })
+}
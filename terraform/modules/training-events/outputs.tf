@@ -0,0 +1,7 @@
+output "queue_url" {
+  value = aws_sqs_queue.training_events.id
+}
+
+output "queue_arn" {
+  value = aws_sqs_queue.training_events.arn
+}
@@ -0,0 +1,10 @@
+variable "project_name" {
+  description = "Name of the project"
+  type        = string
+}
+
+variable "training_job_prefix" {
+  description = "Name prefix of the pipeline's training jobs"
+  type        = string
+  default     = "loan-model-"
+}
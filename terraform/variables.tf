@@ -16,6 +16,12 @@ variable "bucket_name" {
   default     = "teamars"
 }
 
+variable "lambda_scoring_mode" {
+  description = "Lambda scoring mode: endpoint or local"
+  type        = string
+  default     = "endpoint"
+}
+
 variable "github_owner" {
   description = "GitHub repository owner"
   type        = string
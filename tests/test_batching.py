@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'code'))
+
+from batching import MicroBatcher
+
+def blocking_scorer():
+    """score_batch that holds the worker until released, and echoes row sums as labels"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def score_batch(raw):
+        started.set()
+        release.wait(5)
+        return raw.sum(axis=1), np.column_stack([1 - raw[:, 0], raw[:, 0]])
+
+    return score_batch, started, release
+
+def test_scores_each_caller_its_own_rows():
+    batcher = MicroBatcher(lambda raw: (raw.sum(axis=1), raw), max_wait_ms=20)
+    futures = [batcher.submit(np.full((n, 2), n, dtype=float)) for n in (1, 2, 3)]
+    for n, future in zip((1, 2, 3), futures):
+        labels, _ = future.result(2)
+        assert list(labels) == [2.0 * n] * n
+
+def test_cancelled_request_does_not_kill_worker():
+    score_batch, started, release = blocking_scorer()
+    batcher = MicroBatcher(score_batch, max_wait_ms=0)
+
+    busy = batcher.submit(np.ones((1, 2)))
+    assert started.wait(2)
+    # Queued behind the batch being scored, then abandoned by its caller
+    abandoned = batcher.submit(np.ones((1, 2)))
+    assert abandoned.cancel()
+    release.set()
+
+    assert busy.result(2)[0].tolist() == [2.0]
+    labels, _ = batcher.score(np.full((1, 2), 3.0), timeout=2)
+    assert labels.tolist() == [6.0]
+    assert batcher._worker.is_alive()
+    assert batcher.stats['requests'] == 2
+
+def test_deadline_through_wrap_future_leaves_batcher_usable():
+    score_batch, started, release = blocking_scorer()
+    batcher = MicroBatcher(score_batch, max_wait_ms=0)
+    batcher.submit(np.ones((1, 2)))
+    assert started.wait(2)
+
+    async def invoke(timeout):
+        return await asyncio.wait_for(asyncio.wrap_future(batcher.submit(np.ones((1, 2)))), timeout)
+
+    # The way async_proxy.LocalBackend gives up on a request at its deadline
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(invoke(0.05))
+    release.set()
+
+    labels, _ = asyncio.run(invoke(2))
+    assert labels.tolist() == [2.0]
+    assert batcher._worker.is_alive()
+
+def test_scorer_error_reaches_callers_and_worker_survives():
+    calls = []
+
+    def score_batch(raw):
+        calls.append(len(raw))
+        if len(calls) == 1:
+            raise ValueError('bad batch')
+        return raw.sum(axis=1), raw
+
+    batcher = MicroBatcher(score_batch, max_wait_ms=0)
+    with pytest.raises(ValueError):
+        batcher.score(np.ones((1, 2)), timeout=2)
+    assert batcher.score(np.ones((1, 2)), timeout=2)[0].tolist() == [2.0]
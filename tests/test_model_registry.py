@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'Pipeline'))
+
+from model_registry import LocalManifestStore, ModelRegistry
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(LocalManifestStore(str(tmp_path / 'models.json')))
+
+def test_register_approved_becomes_latest(registry):
+    registry.register('v1', 's3://b/v1/model.tar.gz', approved=True)
+    registry.register('v2', 's3://b/v2/model.tar.gz', approved=False)
+    assert registry.latest_approved()['version'] == 'v1'
+    assert registry.versions() == ['v1', 'v2']
+
+def test_reject_falls_back_to_previous_approved(registry):
+    registry.register('v1', 's3://b/v1/model.tar.gz', approved=True)
+    registry.register('v2', 's3://b/v2/model.tar.gz', approved=True)
+    registry.set_approval('v2', False)
+    assert registry.latest_approved()['version'] == 'v1'
+
+def test_reregister_keeps_rejection(registry):
+    registry.register('v1', 's3://b/v1/model.tar.gz', approved=True)
+    registry.set_approval('v1', False)
+    registry.register('v1', 's3://b/v1/model.tar.gz', approved=True)
+    assert registry.get('v1')['approved'] is False
+    assert registry.latest_approved() is None
+
+    registry.set_approval('v1', True)
+    assert registry.latest_approved()['version'] == 'v1'
+
+def test_reregister_unapproved_drops_latest(registry):
+    registry.register('v1', 's3://b/v1/model.tar.gz', approved=True)
+    registry.register('v2', 's3://b/v2/model.tar.gz', approved=True)
+    registry.register('v2', 's3://b/v2/model.tar.gz', approved=False)
+    assert registry.latest_approved()['version'] == 'v1'
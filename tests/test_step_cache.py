@@ -0,0 +1,52 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'Pipeline'))
+
+from step_cache import LocalCacheStore, StepCache, step_key
+
+def test_step_key_changes_with_inputs(tmp_path):
+    data = tmp_path / 'data.csv'
+    code = tmp_path / 'code'
+    code.mkdir()
+    data.write_text('a,b\n1,2\n')
+    (code / 'train.py').write_text('print(1)\n')
+
+    key = step_key('training', files=[str(data)], dirs=[str(code)], params={'epochs': 5})
+    assert key == step_key('training', files=[str(data)], dirs=[str(code)], params={'epochs': 5})
+    assert key != step_key('training', files=[str(data)], dirs=[str(code)], params={'epochs': 6})
+
+    (code / '__pycache__').mkdir()
+    (code / '__pycache__' / 'train.cpython-311.pyc').write_bytes(b'\0')
+    assert key == step_key('training', files=[str(data)], dirs=[str(code)], params={'epochs': 5})
+
+    (code / 'train.py').write_text('print(2)\n')
+    code_changed = step_key('training', files=[str(data)], dirs=[str(code)], params={'epochs': 5})
+    assert code_changed != key
+
+    data.write_text('a,b\n1,3\n')
+    assert step_key('training', files=[str(data)], dirs=[str(code)], params={'epochs': 5}) != code_changed
+
+def test_step_cache_hit_miss_and_missing_artifacts(tmp_path):
+    cache = StepCache(LocalCacheStore(str(tmp_path / 'cache')))
+    artifact = tmp_path / 'model.tar.gz'
+    artifact.write_bytes(b'model')
+    runs = []
+
+    def train():
+        runs.append(1)
+        return {'model': str(artifact)}, {'job_name': f'job-{len(runs)}'}
+
+    first = cache.run('training', 'k1', train)
+    assert not first.get('cached') and len(runs) == 1
+
+    hit = cache.run('training', 'k1', train)
+    assert hit['cached'] and hit['job_name'] == 'job-1' and len(runs) == 1
+
+    cache.run('training', 'k2', train)
+    assert len(runs) == 2
+
+    artifact.unlink()
+    rerun = cache.run('training', 'k1', train)
+    assert not rerun.get('cached') and len(runs) == 3
@@ -0,0 +1,32 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'deploy'))
+
+from traffic_shift import SimulatedEndpoint, Thresholds, TrafficShiftController
+
+def shift(new_profile):
+    endpoint = SimulatedEndpoint({'old': {'latency_ms': 40.0, 'error_rate': 0.001},
+                                  'new': new_profile}, requests_per_second=20.0)
+    controller = TrafficShiftController(endpoint, 'old', 'new', steps=[10, 50, 100], bake_seconds=120,
+                                        check_seconds=30, thresholds=Thresholds(),
+                                        sleep=endpoint.sleep, clock=endpoint.clock)
+    return controller.run(), endpoint
+
+def test_traffic_shift_promotes_healthy_variant():
+    promoted, endpoint = shift({'latency_ms': 42.0, 'error_rate': 0.001})
+    assert promoted
+    assert endpoint.weights == {'old': 0, 'new': 100}
+
+def test_traffic_shift_rolls_back_on_errors():
+    promoted, endpoint = shift({'latency_ms': 42.0, 'error_rate': 0.05})
+    assert not promoted
+    assert endpoint.weights == {'old': 100, 'new': 0}
+    # Canary weights, then the rollback; never past the first step
+    assert [weights['new'] for _, weights in endpoint.history] == [10, 0]
+
+def test_traffic_shift_rolls_back_on_latency():
+    promoted, endpoint = shift({'latency_ms': 200.0, 'error_rate': 0.001})
+    assert not promoted
+    assert endpoint.weights['new'] == 0
@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'Pipeline'))
+
+import training_waiter
+from training_waiter import FOREIGN_EVENT_VISIBILITY_SECONDS, StatusEventQueue, TrainingWaiter
+
+class FakeTime:
+    """Clock that only moves when slept on"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(training_waiter, 'time', fake)
+    return fake
+
+class FakeSageMaker:
+    """Training job that completes after complete_after seconds"""
+
+    def __init__(self, clock, complete_after):
+        self.clock = clock
+        self.done_at = clock.now + complete_after
+        self.calls = 0
+
+    def describe_training_job(self, TrainingJobName):
+        self.calls += 1
+        status = 'Completed' if self.clock.now >= self.done_at else 'InProgress'
+        return {'TrainingJobStatus': status, 'SecondaryStatus': 'Training'}
+
+class FakeSQS:
+    """Queue that returns every message on every receive, ignoring visibility, without waiting"""
+
+    def __init__(self, clock, messages):
+        self.clock = clock
+        self.messages = messages
+        self.deleted = []
+        self.hidden = []
+
+    def receive_message(self, **kwargs):
+        return {'Messages': list(self.messages)}
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        self.deleted.append(ReceiptHandle)
+        self.messages = [m for m in self.messages if m['ReceiptHandle'] != ReceiptHandle]
+
+    def change_message_visibility(self, QueueUrl, ReceiptHandle, VisibilityTimeout):
+        self.hidden.append((ReceiptHandle, VisibilityTimeout))
+
+def event(clock, job_name, status, age_seconds=0):
+    return {'Body': json.dumps({'detail': {'TrainingJobName': job_name, 'TrainingJobStatus': status}}),
+            'ReceiptHandle': f'{job_name}-{status}-{age_seconds}',
+            'Attributes': {'SentTimestamp': str(int((clock.now - age_seconds) * 1000))}}
+
+def test_queue_consumes_own_events_and_hides_or_drops_others(clock):
+    sqs = FakeSQS(clock, [event(clock, 'loan-model-1', 'Completed'),
+                          event(clock, 'loan-model-2', 'InProgress', age_seconds=5),
+                          event(clock, 'loan-model-3', 'Failed', age_seconds=3600)])
+    assert StatusEventQueue(sqs, 'url').wait('loan-model-1', 20) == 'Completed'
+    assert sqs.deleted == ['loan-model-1-Completed-0', 'loan-model-3-Failed-3600']
+    assert sqs.hidden == [('loan-model-2-InProgress-5', FOREIGN_EVENT_VISIBILITY_SECONDS)]
+    assert FOREIGN_EVENT_VISIBILITY_SECONDS > 0
+
+def test_foreign_events_do_not_busy_loop(clock):
+    sagemaker = FakeSageMaker(clock, complete_after=600)
+    sqs = FakeSQS(clock, [event(clock, 'loan-model-other', 'InProgress')])
+    waiter = TrainingWaiter(sagemaker, 'loan-model-1', events=StatusEventQueue(sqs, 'url'),
+                            on_event=lambda e: None)
+    assert waiter.wait()
+    # Every pause lasts its full interval (5s growing to 30s) even though the queue answers at once
+    assert sagemaker.calls <= 600 / 5 + 1
+    assert clock.now - (sagemaker.done_at - 600) >= 600
+
+def test_own_event_ends_the_pause_early(clock):
+    sagemaker = FakeSageMaker(clock, complete_after=0)
+    sagemaker.done_at = float('inf')
+
+    class Events:
+        def wait(self, job_name, timeout):
+            sagemaker.done_at = clock.now
+            return 'Completed'
+
+    waiter = TrainingWaiter(sagemaker, 'loan-model-1', events=Events(), on_event=lambda e: None)
+    assert waiter.wait()
+    assert sagemaker.calls == 2 and clock.now == 1_000_000.0
+
+def test_queue_errors_fall_back_to_sleeping(clock):
+    sagemaker = FakeSageMaker(clock, complete_after=60)
+
+    class Broken:
+        def wait(self, job_name, timeout):
+            raise RuntimeError('AccessDenied')
+
+    waiter = TrainingWaiter(sagemaker, 'loan-model-1', events=Broken(), on_event=lambda e: None)
+    assert waiter.wait()
+    assert waiter.events is None and sagemaker.calls <= 60 / 5 + 1